@@ -1,7 +1,19 @@
+"""
+ASGI entry point.
+
+Run it with an ASGI server, e.g. gunicorn with uvicorn workers:
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker --workers 2 --bind :8000
+
+Under ASGI the task endpoints are served by the native async views in
+tasks.async_views (TASKS_ASYNC_VIEWS), so one worker process can keep many
+requests in flight while they wait on the database.
+"""
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('TASKS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,32 @@
+"""
+Gunicorn settings shared by the WSGI and ASGI deployments.
+
+Sets up prometheus_client's multiprocess mode: workers write their metrics
+to PROMETHEUS_MULTIPROC_DIR and /metrics aggregates all of them. The
+directory is emptied when the master starts, so counters of a previous run
+are not added to the new one.
+
+    gunicorn -c config/gunicorn.conf.py config.wsgi:application
+"""
+import os
+import shutil
+
+# Must be set before prometheus_client is imported: it picks the in-memory
+# or the multiprocess value class at import time, and the workers forked
+# from this master inherit that choice.
+multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+from prometheus_client import multiprocess  # noqa: E402
+
+bind = os.getenv("GUNICORN_BIND", ":8000")
+# Exported so the settings know the task read cache is shared by the workers.
+workers = int(os.environ.setdefault("GUNICORN_WORKERS", "2"))
+
+
+def on_starting(server):
+  shutil.rmtree(multiproc_dir, ignore_errors=True)
+  os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+  multiprocess.mark_process_dead(worker.pid)
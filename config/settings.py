@@ -36,9 +36,13 @@ INSTALLED_APPS = [
     # local applications
     "users",
     "tasks",
+    "monitoring",
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.ServerTimingMiddleware',
+    'monitoring.middleware.PrometheusMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +54,42 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'config.urls'
 
+# Request instrumentation (monitoring.middleware.ServerTimingMiddleware):
+# share of requests that get a Server-Timing header and a log line, and the
+# per-request budgets above which a request is always reported as a warning.
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv('REQUEST_TIMING_SAMPLE_RATE', '0.01'))
+REQUEST_QUERY_BUDGET = int(os.getenv('REQUEST_QUERY_BUDGET', '20'))
+REQUEST_LATENCY_BUDGET_MS = float(os.getenv('REQUEST_LATENCY_BUDGET_MS', '500'))
+
+# On-demand profiling (monitoring.middleware.ProfilingMiddleware). Off by
+# default; when enabled, PROFILING_SAMPLE_RATE of the requests to
+# PROFILING_URL_NAMES are profiled (or what `manage.py profiling start`
+# asks for), and superusers can profile a request with PROFILING_HEADER.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '0').lower() in ['true', 't', '1']
+PROFILING_DIR = os.getenv('PROFILING_DIR', '/tmp/hypertask-profiles')
+PROFILING_URL_NAMES = os.getenv('PROFILING_URL_NAMES', '').split()
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0.01'))
+PROFILING_HEADER = 'X-Profile'
+
+# Bearer token required to read /metrics; when empty, /metrics is only
+# served with DEBUG on.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'monitoring': {
+            'handlers': ['console'],
+            'level': os.getenv('MONITORING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # setup users.CustomUser model as AUTH_USER_MODEL
 AUTH_USER_MODEL = "users.CustomUser"
 
@@ -76,6 +116,8 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 
     'JTI_CLAIM': 'jti',
+
+    'TOKEN_REFRESH_SERIALIZER': 'users.auth.serializer.CachedTokenRefreshSerializer',
 }
 
 TEMPLATES = [
@@ -98,18 +140,48 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 
 # Database
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before
+# reuse, instead of paying a new TLS handshake on every request. Set DB_POOL
+# to use a psycopg connection pool per process instead (recommended under
+# ASGI, where persistent connections are not reused across requests).
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'monitoring.backends.postgresql',
         'NAME': os.environ.get('DB_NAME'),
         'HOST' : os.environ.get('DB_HOST'),
         'PASSWORD': os.environ.get('DB_PASS'),
         'PORT': os.environ.get('DB_PORT'),
         'USER': os.environ.get('DB_USER'),
         'CERT' : 'config.prod-ca-2021.crt',
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', '1').lower() in ['true', 't', '1'],
     }
 }
 
+if os.getenv('DB_POOL', '0').lower() in ['true', 't', '1']:
+    # Pooling doesn't support persistent connections.
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        }
+    }
+
+# Passwords are hashed with PBKDF2-SHA256 at AUTH_PASSWORD_ITERATIONS
+# iterations (0 keeps Django's default). Hashes with a different count are
+# upgraded on the next login; the other hashers only verify legacy hashes.
+AUTH_PASSWORD_ITERATIONS = int(os.getenv('AUTH_PASSWORD_ITERATIONS', '0'))
+
+PASSWORD_HASHERS = [
+    'users.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -141,6 +213,84 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.auth.authentication.CachedJWTAuthentication',
     )
 }
+
+# Users resolved from access tokens are cached per process by
+# CachedJWTAuthentication. A worker drops its entry as soon as it saves the
+# user (and again when the save commits); other workers pick the change up
+# within AUTH_USER_CACHE_TTL seconds. A deactivated user, or one whose record
+# changed, can therefore keep authenticating on other workers for up to that
+# long. Updates that bypass save() (QuerySet.update()) are only seen after
+# the TTL, in every worker. 0 disables the cache.
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '10000'))
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '10'))
+
+# Refresh tokens are checked against a per-process Bloom filter of
+# blacklisted JTIs, synced from the database every
+# AUTH_BLACKLIST_SYNC_INTERVAL seconds (0 queries the database on every
+# check). Tokens blacklisted by another worker are rejected here after at
+# most one interval.
+AUTH_BLACKLIST_CACHE_SIZE = int(os.getenv('AUTH_BLACKLIST_CACHE_SIZE', '100000'))
+AUTH_BLACKLIST_CACHE_ERROR_RATE = float(os.getenv('AUTH_BLACKLIST_CACHE_ERROR_RATE', '0.01'))
+AUTH_BLACKLIST_SYNC_INTERVAL = float(os.getenv('AUTH_BLACKLIST_SYNC_INTERVAL', '5'))
+
+# Cache
+# Defaults to a per-process in-memory cache, which is only right for a single
+# worker process. With several workers (the Docker image runs
+# GUNICORN_WORKERS=2), point CACHE_BACKEND/CACHE_LOCATION at a shared cache
+# (e.g. Redis, Memcached or django.core.cache.backends.db.DatabaseCache) so
+# that writes handled by one worker invalidate the reads cached by the others.
+# Until then the task read cache is bypassed: a worker would keep serving
+# lists and 304s that another worker's write made stale.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'hypertask'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))}
+
+# Serve the task endpoints with the native async views (set by config.asgi)
+TASKS_ASYNC_VIEWS = os.getenv('TASKS_ASYNC_VIEWS', '0').lower() in ['true', 't', '1']
+
+# Task list and task detail read cache
+TASKS_CACHE_ALIAS = 'default'
+# Number of worker processes sharing the cache (exported by
+# config/gunicorn.conf.py); above 1, a process-local cache is not used.
+TASKS_CACHE_WORKERS = int(os.getenv('GUNICORN_WORKERS', '1'))
+TASKS_CACHE_TIMEOUT = int(os.getenv('TASKS_CACHE_TIMEOUT', '60'))
+
+# Task list pagination (keyset pagination over created_at, id)
+TASKS_PAGE_SIZE = int(os.getenv('TASKS_PAGE_SIZE', '100'))
+TASKS_MAX_PAGE_SIZE = int(os.getenv('TASKS_MAX_PAGE_SIZE', '1000'))
+
+# Number of task ids written per UPDATE statement by the bulk endpoints
+TASKS_BULK_CHUNK_SIZE = int(os.getenv('TASKS_BULK_CHUNK_SIZE', '500'))
+
+# Maximum number of tasks accepted by a single bulk-create request
+TASKS_BULK_CREATE_MAX_SIZE = int(os.getenv('TASKS_BULK_CREATE_MAX_SIZE', '10000'))
+
+# Maximum number of operations accepted by a single batch request
+TASKS_BATCH_MAX_OPERATIONS = int(os.getenv('TASKS_BATCH_MAX_OPERATIONS', '100'))
+
+# Rows fetched per round trip (and written per chunk) by the task export
+TASKS_EXPORT_CHUNK_SIZE = int(os.getenv('TASKS_EXPORT_CHUNK_SIZE', '2000'))
+
+# Delta sync (GET /api/v1/tasks/changes) only returns changes older than this
+# many seconds, so writes committed out of updated_at order (concurrent
+# transactions, clock skew between workers) cannot land behind a client's cursor.
+TASKS_CHANGES_SETTLE_SECONDS = float(os.getenv('TASKS_CHANGES_SETTLE_SECONDS', '2'))
+
+# Archival of soft-deleted tasks (manage.py archive_tasks): tasks deleted more
+# than TASKS_ARCHIVE_AFTER_DAYS ago move to the tasks_archive table, in
+# transactions of TASKS_ARCHIVE_BATCH_SIZE rows with a pause of
+# TASKS_ARCHIVE_BATCH_DELAY seconds between them. Archived tasks are purged
+# after TASKS_ARCHIVE_PURGE_AFTER_DAYS more days (0 keeps them forever).
+TASKS_ARCHIVE_AFTER_DAYS = int(os.getenv('TASKS_ARCHIVE_AFTER_DAYS', '30'))
+TASKS_ARCHIVE_BATCH_SIZE = int(os.getenv('TASKS_ARCHIVE_BATCH_SIZE', '500'))
+TASKS_ARCHIVE_BATCH_DELAY = float(os.getenv('TASKS_ARCHIVE_BATCH_DELAY', '0.1'))
+TASKS_ARCHIVE_PURGE_AFTER_DAYS = int(os.getenv('TASKS_ARCHIVE_PURGE_AFTER_DAYS', '365'))
@@ -1,10 +1,18 @@
 from django.urls import path, include
 from rest_framework_simplejwt import views as jwt_views
 
+from monitoring.views import metrics_view
+
 urlpatterns = [
   # user apis (register, login, refresh-token)
   path('api/v1/', include('users.urls')),
 
   # tasks api
   path('api/v1/', include("tasks.urls")),
+
+  # monitoring api
+  path('api/v1/', include("monitoring.urls")),
+
+  # prometheus metrics
+  path('metrics', metrics_view, name='metrics'),
 ]
\ No newline at end of file
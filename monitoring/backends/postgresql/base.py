@@ -0,0 +1,21 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from monitoring.db import connection_stats
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+  """
+  PostgreSQL backend that records how long it takes to acquire a connection.
+
+  With a pool this is the time spent waiting for a free pooled connection;
+  without one it is the time spent opening (and TLS-handshaking) a new one.
+  """
+
+  def get_new_connection(self, conn_params):
+    start = time.perf_counter()
+    try:
+      return super().get_new_connection(conn_params)
+    finally:
+      connection_stats.record_acquire(self.alias, time.perf_counter() - start)
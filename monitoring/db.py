@@ -0,0 +1,124 @@
+import threading
+
+from django.db import connections
+
+
+class ConnectionStats:
+  """
+  Process-local counters of database connections acquired by this process.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._aliases = {}
+
+  def record_acquire(self, alias, seconds):
+    with self._lock:
+      count, total = self._aliases.get(alias, (0, 0.0))
+      self._aliases[alias] = (count + 1, total + seconds)
+
+  def as_dict(self, alias):
+    with self._lock:
+      count, total = self._aliases.get(alias, (0, 0.0))
+    return {
+      "acquired": count,
+      "acquire_ms_total": round(total * 1000, 3),
+      "acquire_ms_avg": round(total * 1000 / count, 3) if count else 0.0,
+    }
+
+  def reset(self):
+    with self._lock:
+      self._aliases.clear()
+
+
+connection_stats = ConnectionStats()
+
+
+def pool_stats(connection):
+  """
+  Return the statistics of the connection pool of a database connection.
+
+  Args:
+    connection: A Django database connection.
+
+  Returns:
+    dict: Pool size, connections in use and idle, clients waiting and the
+      time spent waiting for a connection, or None if the connection is not
+      pooled.
+  """
+  pool = getattr(connection, "pool", None)
+  if pool is None:
+    return None
+  raw = pool.get_stats()
+  size = raw.get("pool_size", 0)
+  idle = raw.get("pool_available", 0)
+  requests = raw.get("requests_num", 0)
+  wait_ms = raw.get("requests_wait_ms", 0)
+  return {
+    "min_size": raw.get("pool_min", 0),
+    "max_size": raw.get("pool_max", 0),
+    "size": size,
+    "in_use": size - idle,
+    "idle": idle,
+    "waiting": raw.get("requests_waiting", 0),
+    "requests": requests,
+    "wait_ms_total": wait_ms,
+    "wait_ms_avg": round(wait_ms / requests, 3) if requests else 0.0,
+    "timeouts": raw.get("requests_errors", 0),
+  }
+
+
+def server_stats(connection):
+  """
+  Return the server-side connection usage of the database.
+
+  Counts the client connections to the current database by state across all
+  processes and hosts, next to `max_connections`, so workers can be sized
+  against the server's connection limit.
+
+  Returns:
+    dict: max_connections and a count per connection state, or None on
+      backends other than PostgreSQL.
+  """
+  if connection.vendor != "postgresql":
+    return None
+  with connection.cursor() as cursor:
+    cursor.execute("SHOW max_connections")
+    max_connections = int(cursor.fetchone()[0])
+    cursor.execute(
+      "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+      "WHERE datname = current_database() AND backend_type = 'client backend' "
+      "GROUP BY 1"
+    )
+    states = {state.replace(" ", "_"): count for state, count in cursor.fetchall()}
+  return {
+    "max_connections": max_connections,
+    "connections": sum(states.values()),
+    "states": states,
+  }
+
+
+def database_stats(alias="default"):
+  """
+  Collect the connection statistics of a database alias.
+
+  Args:
+    alias (str): Database alias from settings.DATABASES.
+
+  Returns:
+    dict: Connection settings, process-local acquire counters, pool
+      statistics (when pooled) and server-side connection usage (PostgreSQL).
+  """
+  connection = connections[alias]
+  settings_dict = connection.settings_dict
+  pool = pool_stats(connection)
+  return {
+    "alias": alias,
+    "vendor": connection.vendor,
+    "pooled": pool is not None,
+    "conn_max_age": settings_dict.get("CONN_MAX_AGE"),
+    "conn_health_checks": settings_dict.get("CONN_HEALTH_CHECKS"),
+    "process": connection_stats.as_dict(alias),
+    "pool": pool,
+    "server": server_stats(connection),
+  }
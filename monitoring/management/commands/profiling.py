@@ -0,0 +1,73 @@
+import io
+import pstats
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.profiling import profile_files, remove_control, write_control
+
+
+class Command(BaseCommand):
+  help = (
+    "Control request profiling of the running workers (needs "
+    "PROFILING_ENABLED) and report the collected profiles. 'start' samples "
+    "requests to the given URL names on every worker for a while, 'stop' "
+    "ends it, 'report' merges the profiles of all workers and 'clear' "
+    "deletes them."
+  )
+
+  def add_arguments(self, parser):
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    start = subparsers.add_parser("start", help="Start profiling requests to the given URL names.")
+    start.add_argument("url_names", nargs="+", help="URL names, e.g. task-list-create.")
+    start.add_argument("--sample-rate", type=float, default=0.1)
+    start.add_argument("--duration", type=int, default=300, help="Seconds to keep profiling.")
+
+    subparsers.add_parser("stop", help="Stop profiling started with 'start'.")
+
+    report = subparsers.add_parser("report", help="Print the merged profiles.")
+    report.add_argument("--url-name", help="Only report this URL name.")
+    report.add_argument("--sort", default="cumulative", help="pstats sort key.")
+    report.add_argument("--limit", type=int, default=30, help="Number of functions to print.")
+    report.add_argument("--output", help="Also write the merged profile to this file.")
+
+    subparsers.add_parser("clear", help="Delete all collected profiles.")
+
+  def handle(self, *args, **options):
+    directory = settings.PROFILING_DIR
+    action = options["action"]
+    if action == "start":
+      if not settings.PROFILING_ENABLED:
+        self.stderr.write("PROFILING_ENABLED is off: the workers will ignore this until it is set.")
+      control = write_control(directory, options["url_names"], options["sample_rate"], options["duration"])
+      self.stdout.write(
+        f"Profiling {', '.join(control['url_names'])} at a sample rate of "
+        f"{control['sample_rate']} for {options['duration']}s."
+      )
+    elif action == "stop":
+      remove_control(directory)
+      self.stdout.write("Profiling stopped.")
+    elif action == "report":
+      self.report(directory, options)
+    elif action == "clear":
+      for path in Path(directory).glob("*.prof"):
+        path.unlink()
+      self.stdout.write("Profiles deleted.")
+
+  def report(self, directory, options):
+    files = profile_files(directory, options["url_name"])
+    if not files:
+      raise CommandError(f"No profiles in {directory}.")
+    url_names = sorted({path.name.split(".", 1)[0] for path in files})
+    for url_name in url_names:
+      paths = [str(path) for path in files if path.name.split(".", 1)[0] == url_name]
+      stream = io.StringIO()
+      stats = pstats.Stats(*paths, stream=stream)
+      stats.sort_stats(options["sort"]).print_stats(options["limit"])
+      self.stdout.write(f"== {url_name} ({len(paths)} workers)")
+      self.stdout.write(stream.getvalue())
+      if options["output"]:
+        output = options["output"] if len(url_names) == 1 else f"{options['output']}.{url_name}"
+        stats.dump_stats(output)
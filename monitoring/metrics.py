@@ -0,0 +1,74 @@
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+# With PROMETHEUS_MULTIPROC_DIR set (see config/gunicorn.conf.py), every
+# worker writes its samples to memory-mapped files in that directory and
+# /metrics sums the files of all workers, whichever worker serves it.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUESTS = Counter(
+  "http_requests_total", "HTTP requests by view, method and status code.",
+  ["view", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+  "http_request_duration_seconds", "Time to serve a request, by view and method.",
+  ["view", "method"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+  "http_request_queries", "SQL queries run by a request, by view and method.",
+  ["view", "method"], buckets=QUERY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+  "cache_requests_total", "Lookups in the application caches, by cache and result (hit or miss).",
+  ["cache", "result"],
+)
+
+
+def record_cache(cache, hit):
+  """Count one lookup in the named cache."""
+  CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def view_name(request):
+  """Return the class or function name of the view that served the request."""
+  match = getattr(request, "resolver_match", None)
+  if match is None:
+    return "unmatched"
+  func = match.func
+  view_class = getattr(func, "view_class", None) or getattr(func, "cls", None)
+  return (view_class or func).__name__
+
+
+def observe_request(request, response, seconds, queries=None):
+  """
+  Record a served request.
+
+  Args:
+    request: The HTTP request.
+    response: Its response.
+    seconds (float): Time taken to serve it.
+    queries (int): SQL queries it ran, if known.
+  """
+  view, method = view_name(request), request.method
+  REQUESTS.labels(view, method, str(response.status_code)).inc()
+  REQUEST_LATENCY.labels(view, method).observe(seconds)
+  if queries is not None:
+    REQUEST_QUERIES.labels(view, method).observe(queries)
+
+
+def render_metrics():
+  """
+  Render all metrics in the Prometheus text format.
+
+  Returns:
+    tuple: (body, content_type)
+  """
+  if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+  else:
+    registry = REGISTRY
+  return generate_latest(registry), CONTENT_TYPE_LATEST
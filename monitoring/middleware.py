@@ -0,0 +1,198 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.exceptions import APIException
+
+from users.auth.authentication import CachedJWTAuthentication
+
+from . import metrics
+from .profiling import Profiles
+from .timing import RequestTiming, current_timing
+
+logger = logging.getLogger("monitoring.requests")
+
+
+class ServerTimingMiddleware:
+  """
+  Measure where each request spends its time and report it.
+
+  Records the SQL query count and DB time, the time spent in JWT
+  authentication, in the view and in rendering the response. A sample of
+  REQUEST_TIMING_SAMPLE_RATE requests gets a `Server-Timing` header and an
+  INFO log line with the same numbers as JSON. Requests over
+  REQUEST_QUERY_BUDGET queries or REQUEST_LATENCY_BUDGET_MS milliseconds
+  always get both, logged as WARNING.
+
+  Should be the first middleware, so that the total covers all the others.
+  """
+  sync_capable = True
+  async_capable = True
+
+  def __init__(self, get_response):
+    self.get_response = get_response
+    if iscoroutinefunction(get_response):
+      markcoroutinefunction(self)
+
+  def __call__(self, request):
+    if iscoroutinefunction(self):
+      return self.__acall__(request)
+    timing = RequestTiming()
+    token = current_timing.set(timing)
+    try:
+      response = self.get_response(request)
+    finally:
+      current_timing.reset(token)
+    return self.report(request, response, timing)
+
+  async def __acall__(self, request):
+    timing = RequestTiming()
+    token = current_timing.set(timing)
+    try:
+      response = await self.get_response(request)
+    finally:
+      current_timing.reset(token)
+    return self.report(request, response, timing)
+
+  def process_view(self, request, view_func, view_args, view_kwargs):
+    timing = current_timing.get()
+    if timing is not None:
+      timing.view_started = time.perf_counter()
+
+  def process_template_response(self, request, response):
+    # Called right after the view returns a DRF Response, before it is rendered.
+    timing = current_timing.get()
+    if timing is not None and timing.view_started is not None:
+      timing.view_ended = time.perf_counter()
+    return response
+
+  def report(self, request, response, timing):
+    ended = time.perf_counter()
+    if timing.view_started is not None:
+      view_ended = timing.view_ended or ended
+      timing.add("view", view_ended - timing.view_started)
+      if timing.view_ended is not None:
+        timing.add("render", ended - view_ended)
+    total = ended - timing.started
+
+    over_budget = []
+    if timing.queries > settings.REQUEST_QUERY_BUDGET:
+      over_budget.append("queries")
+    if total * 1000 > settings.REQUEST_LATENCY_BUDGET_MS:
+      over_budget.append("latency")
+    if not over_budget and random.random() >= settings.REQUEST_TIMING_SAMPLE_RATE:
+      return response
+
+    metrics = [("total", total, None), ("db", timing.db_time, f"{timing.queries} queries")]
+    metrics += [(name, seconds, None) for name, seconds in timing.spans.items()]
+    if over_budget:
+      metrics.append(("budget", 0.0, f"over {' and '.join(over_budget)} budget"))
+    response["Server-Timing"] = ", ".join(
+      f'{name};dur={seconds * 1000:.2f}' + (f';desc="{desc}"' if desc else "")
+      for name, seconds, desc in metrics
+    )
+
+    record = {
+      "method": request.method,
+      "path": request.path,
+      "status": response.status_code,
+      "queries": timing.queries,
+      "db_ms": round(timing.db_time * 1000, 2),
+      "total_ms": round(total * 1000, 2),
+      **{f"{name}_ms": round(seconds * 1000, 2) for name, seconds in timing.spans.items()},
+      "over_budget": over_budget,
+    }
+    logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record))
+    return response
+
+
+class PrometheusMiddleware:
+  """
+  Record request count, latency and SQL query count per view for /metrics.
+
+  Place it right after ServerTimingMiddleware, whose per-request timing
+  provides the query count.
+  """
+  sync_capable = True
+  async_capable = True
+
+  def __init__(self, get_response):
+    self.get_response = get_response
+    if iscoroutinefunction(get_response):
+      markcoroutinefunction(self)
+
+  def __call__(self, request):
+    if iscoroutinefunction(self):
+      return self.__acall__(request)
+    start = time.perf_counter()
+    response = self.get_response(request)
+    self.observe(request, response, start)
+    return response
+
+  async def __acall__(self, request):
+    start = time.perf_counter()
+    response = await self.get_response(request)
+    self.observe(request, response, start)
+    return response
+
+  def observe(self, request, response, start):
+    timing = current_timing.get()
+    metrics.observe_request(
+      request, response, time.perf_counter() - start,
+      queries=timing.queries if timing is not None else None,
+    )
+
+
+class ProfilingMiddleware:
+  """
+  Profile a sample of the requests to selected URL names with cProfile.
+
+  Only installed when PROFILING_ENABLED is set; otherwise it removes itself
+  from the middleware chain at startup and costs nothing. Which requests
+  are sampled is described in monitoring.profiling.Profiles. A superuser can
+  also profile a single request by sending the PROFILING_HEADER header;
+  its profile is written to its own file, named in the response header of
+  the same name.
+
+  Synchronous only: profiling follows a thread, so under ASGI the requests
+  below this middleware run in a worker thread while it is enabled.
+  """
+
+  def __init__(self, get_response):
+    if not settings.PROFILING_ENABLED:
+      raise MiddlewareNotUsed
+    self.get_response = get_response
+    self.profiles = Profiles(settings.PROFILING_DIR)
+
+  def __call__(self, request):
+    response = self.get_response(request)
+    profiler = getattr(request, "_profiler", None)
+    if profiler is not None:
+      name = self.profiles.stop(profiler, request.resolver_match.url_name, keep=request._profile_forced)
+      if name is not None:
+        response[settings.PROFILING_HEADER] = name
+    return response
+
+  def process_view(self, request, view_func, view_args, view_kwargs):
+    url_name = request.resolver_match.url_name
+    if url_name is None:
+      return None
+    forced = self.is_forced(request)
+    if forced or self.profiles.should_sample(url_name):
+      request._profiler = self.profiles.start()
+      request._profile_forced = forced
+    return None
+
+  def is_forced(self, request):
+    """Return whether a superuser asked for this request to be profiled."""
+    if not request.headers.get(settings.PROFILING_HEADER):
+      return False
+    try:
+      user_auth = CachedJWTAuthentication().authenticate(request)
+    except APIException:
+      return False
+    return user_auth is not None and user_auth[0].is_superuser
@@ -0,0 +1,140 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+CONTROL_FILE = "control.json"
+# Seconds between two checks of the control file for changes.
+CONTROL_CHECK_INTERVAL = 1.0
+
+
+class Profiles:
+  """
+  Aggregated cProfile statistics of the sampled requests of this worker.
+
+  Requests are sampled per URL name, either from the PROFILING_URL_NAMES and
+  PROFILING_SAMPLE_RATE settings or from the control file written by
+  `manage.py profiling start`, which takes precedence until it expires. The
+  statistics of every URL name are accumulated in memory and written to
+  `<PROFILING_DIR>/<url name>.<pid>.prof` after each sampled request, so
+  they can be merged across workers with `manage.py profiling report`.
+
+  Only one request is profiled at a time per worker; requests arriving
+  while another one is being profiled are not sampled.
+  """
+
+  def __init__(self, directory):
+    self.directory = Path(directory)
+    self.stats = {}
+    self._lock = threading.Lock()
+    self._busy = threading.Lock()
+    self._control = None
+    self._control_mtime = None
+    self._control_checked = 0.0
+
+  def control(self):
+    """Return the control file contents if profiling was started and has not expired."""
+    now = time.monotonic()
+    if now - self._control_checked >= CONTROL_CHECK_INTERVAL:
+      self._control_checked = now
+      path = self.directory / CONTROL_FILE
+      try:
+        mtime = path.stat().st_mtime
+      except OSError:
+        self._control, self._control_mtime = None, None
+      else:
+        if mtime != self._control_mtime:
+          try:
+            self._control = json.loads(path.read_text())
+          except (OSError, ValueError):
+            self._control = None
+          self._control_mtime = mtime
+    control = self._control
+    if control is not None and control.get("until", 0) > time.time():
+      return control
+    return None
+
+  def should_sample(self, url_name):
+    """Return whether a request to the URL name should be profiled."""
+    control = self.control()
+    if control is not None:
+      url_names, sample_rate = control.get("url_names") or [], control.get("sample_rate", 0.0)
+    else:
+      url_names, sample_rate = settings.PROFILING_URL_NAMES, settings.PROFILING_SAMPLE_RATE
+    return url_name in url_names and random.random() < sample_rate
+
+  def start(self):
+    """
+    Start profiling the current request.
+
+    Returns:
+      cProfile.Profile: The running profiler, or None if another request
+        of this worker is being profiled.
+    """
+    if not self._busy.acquire(blocking=False):
+      return None
+    profiler = cProfile.Profile()
+    try:
+      profiler.enable()
+    except ValueError:
+      # Another profiler (e.g. a debugger) is active.
+      self._busy.release()
+      return None
+    return profiler
+
+  def stop(self, profiler, url_name, keep=False):
+    """
+    Stop the profiler and add its statistics to those of the URL name.
+
+    Args:
+      profiler: Profiler returned by start().
+      url_name (str): URL name of the profiled request.
+      keep (bool): Also write this request's profile to its own file.
+
+    Returns:
+      str: Name of the file holding this request's profile if kept, else None.
+    """
+    profiler.disable()
+    self._busy.release()
+    self.directory.mkdir(parents=True, exist_ok=True)
+    with self._lock:
+      stats = self.stats.get(url_name)
+      if stats is None:
+        stats = self.stats[url_name] = pstats.Stats(profiler)
+      else:
+        stats.add(profiler)
+      stats.dump_stats(self.directory / f"{url_name}.{os.getpid()}.prof")
+    if not keep:
+      return None
+    name = f"request-{url_name}-{time.time_ns()}.prof"
+    profiler.dump_stats(self.directory / name)
+    return name
+
+
+def write_control(directory, url_names, sample_rate, duration):
+  """Start profiling the URL names on every worker for `duration` seconds."""
+  directory = Path(directory)
+  directory.mkdir(parents=True, exist_ok=True)
+  control = {"url_names": list(url_names), "sample_rate": sample_rate, "until": time.time() + duration}
+  path = directory / CONTROL_FILE
+  tmp_path = path.with_suffix(".tmp")
+  tmp_path.write_text(json.dumps(control))
+  tmp_path.replace(path)
+  return control
+
+
+def remove_control(directory):
+  """Stop profiling started with write_control()."""
+  (Path(directory) / CONTROL_FILE).unlink(missing_ok=True)
+
+
+def profile_files(directory, url_name=None):
+  """Return the aggregated profile files of all workers, optionally of one URL name."""
+  pattern = f"{url_name}.*.prof" if url_name else "*.prof"
+  return sorted(path for path in Path(directory).glob(pattern) if not path.name.startswith("request-"))
@@ -0,0 +1,244 @@
+import io
+import json
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .db import ConnectionStats, pool_stats
+from .middleware import ProfilingMiddleware
+
+User = get_user_model()
+
+
+class StubPool:
+  """Stands in for a psycopg_pool.ConnectionPool."""
+
+  def __init__(self, stats):
+    self.stats = stats
+
+  def get_stats(self):
+    return self.stats
+
+
+class StubConnection:
+  def __init__(self, pool):
+    self.pool = pool
+
+
+class DatabaseStatsTests(TestCase):
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="monitor@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+
+  def test_requires_superuser(self):
+    """Test that database statistics are only visible to superusers."""
+    url = reverse('monitoring-db-stats')
+    self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+    self.user.is_superuser = True
+    self.user.save()
+    response = self.client.get(url)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(response.data['vendor'], connection.vendor)
+    self.assertFalse(response.data['pooled'])
+    self.assertIn('acquire_ms_avg', response.data['process'])
+
+
+class PoolStatsTests(SimpleTestCase):
+  def test_unpooled_connection(self):
+    """Test that a connection without a pool has no pool statistics."""
+    self.assertIsNone(pool_stats(StubConnection(None)))
+
+  def test_pool_usage(self):
+    """Test that pool counters are reported as in use, idle and wait time."""
+    pool = StubPool({
+      "pool_min": 2, "pool_max": 10, "pool_size": 6, "pool_available": 2,
+      "requests_waiting": 1, "requests_num": 4, "requests_wait_ms": 10,
+    })
+    stats = pool_stats(StubConnection(pool))
+    self.assertEqual(stats["in_use"], 4)
+    self.assertEqual(stats["idle"], 2)
+    self.assertEqual(stats["waiting"], 1)
+    self.assertEqual(stats["wait_ms_avg"], 2.5)
+    self.assertEqual(stats["timeouts"], 0)
+
+  def test_acquire_counters(self):
+    """Test that connection acquire times are accumulated per alias."""
+    stats = ConnectionStats()
+    stats.record_acquire("default", 0.002)
+    stats.record_acquire("default", 0.004)
+    self.assertEqual(stats.as_dict("default")["acquired"], 2)
+    self.assertEqual(stats.as_dict("default")["acquire_ms_avg"], 3.0)
+    self.assertEqual(stats.as_dict("other")["acquired"], 0)
+
+
+class ServerTimingTests(TestCase):
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="timing@gmail.com", password="testpassword")
+    access = RefreshToken.for_user(self.user).access_token
+    self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+  @override_settings(REQUEST_TIMING_SAMPLE_RATE=1.0)
+  def test_sampled_request_gets_server_timing(self):
+    """Test that a sampled request reports its queries, auth, view and render time."""
+    with self.assertLogs("monitoring.requests", "INFO") as logs:
+      response = self.client.get("/api/v1/tasks")
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    header = response["Server-Timing"]
+    for metric in ("total;dur=", "db;dur=", "auth;dur=", "view;dur=", "render;dur="):
+      self.assertIn(metric, header)
+    record = json.loads(logs.records[0].getMessage())
+    self.assertEqual(record["path"], "/api/v1/tasks")
+    self.assertGreater(record["queries"], 0)
+    self.assertIn(f'desc="{record["queries"]} queries"', header)
+    self.assertEqual(record["over_budget"], [])
+
+  @override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0)
+  def test_unsampled_request_has_no_header(self):
+    """Test that requests outside the sample are not reported."""
+    response = self.client.get("/api/v1/tasks")
+    self.assertNotIn("Server-Timing", response)
+
+  @override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0, REQUEST_QUERY_BUDGET=0)
+  def test_over_budget_request_is_flagged(self):
+    """Test that requests over the query budget are always reported as warnings."""
+    with self.assertLogs("monitoring.requests", "WARNING") as logs:
+      response = self.client.get("/api/v1/tasks")
+    self.assertIn('budget;dur=0.00;desc="over queries budget"', response["Server-Timing"])
+    self.assertEqual(json.loads(logs.records[0].getMessage())["over_budget"], ["queries"])
+
+
+class MetricsTests(TestCase):
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="metrics@gmail.com", password="testpassword")
+    access = RefreshToken.for_user(self.user).access_token
+    self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+  def sample(self, name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+  def test_requests_are_counted_per_view(self):
+    """Test that requests, latency, queries and cache lookups are recorded per view."""
+    labels = {"view": "TaskListCreateView", "method": "GET"}
+    requests = self.sample("http_requests_total", status="200", **labels)
+    observed = self.sample("http_request_duration_seconds_count", **labels)
+    queries = self.sample("http_request_queries_count", **labels)
+    misses = self.sample("cache_requests_total", cache="tasks", result="miss")
+
+    self.client.get("/api/v1/tasks")
+
+    self.assertEqual(self.sample("http_requests_total", status="200", **labels), requests + 1)
+    self.assertEqual(self.sample("http_request_duration_seconds_count", **labels), observed + 1)
+    self.assertEqual(self.sample("http_request_queries_count", **labels), queries + 1)
+    self.assertEqual(self.sample("cache_requests_total", cache="tasks", result="miss"), misses + 1)
+
+  @override_settings(DEBUG=True, METRICS_TOKEN="")
+  def test_metrics_endpoint(self):
+    """Test that /metrics serves the Prometheus text format."""
+    self.client.get("/api/v1/tasks")
+    response = self.client.get(reverse('metrics'))
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertTrue(response["Content-Type"].startswith("text/plain"))
+    self.assertIn(b'http_requests_total{method="GET",status="200",view="TaskListCreateView"}', response.content)
+    self.assertIn(b"http_request_duration_seconds_bucket", response.content)
+
+  @override_settings(METRICS_TOKEN="scrape-secret")
+  def test_metrics_token(self):
+    """Test that /metrics requires the configured bearer token."""
+    self.client.credentials()
+    self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+    response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION="Bearer scrape-secret")
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+  @override_settings(DEBUG=False, METRICS_TOKEN="")
+  def test_metrics_hidden_without_token(self):
+    """Test that /metrics is not served without a token outside DEBUG."""
+    self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GunicornConfigTests(SimpleTestCase):
+  def test_config_enables_multiprocess_metrics(self):
+    """Test that loading the gunicorn config makes prometheus_client use the multiprocess value class."""
+    script = (
+      "import runpy; runpy.run_path('config/gunicorn.conf.py'); "
+      "from prometheus_client import values; "
+      "print(values.ValueClass is not values.MutexValue)"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "PROMETHEUS_MULTIPROC_DIR"}
+    result = subprocess.run(
+      [sys.executable, "-c", script], cwd=Path(__file__).resolve().parent.parent,
+      env=env, capture_output=True, text=True, check=True,
+    )
+    self.assertEqual(result.stdout.strip(), "True")
+
+
+class ProfilingTests(TestCase):
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+    self.user = User.objects.create_user(email="profiler@gmail.com", password="testpassword")
+    access = RefreshToken.for_user(self.user).access_token
+    self.auth = {"HTTP_AUTHORIZATION": f"Bearer {access}"}
+
+  def profiles(self, pattern="*.prof"):
+    return sorted(path.name for path in Path(self.directory).glob(pattern))
+
+  def test_disabled_middleware_is_not_installed(self):
+    """Test that the profiler removes itself from the chain when disabled."""
+    with override_settings(PROFILING_ENABLED=False):
+      with self.assertRaises(MiddlewareNotUsed):
+        ProfilingMiddleware(lambda request: None)
+
+  def test_sampled_requests_are_aggregated(self):
+    """Test that sampled requests to the selected URL names are profiled together."""
+    with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory,
+                           PROFILING_URL_NAMES=["task-list-create"], PROFILING_SAMPLE_RATE=1.0):
+      client = APIClient()
+      client.get("/api/v1/tasks", **self.auth)
+      client.get("/api/v1/tasks", **self.auth)
+      client.get("/api/v1/users/me", **self.auth)
+    self.assertEqual(self.profiles(), [f"task-list-create.{os.getpid()}.prof"])
+    stats = pstats.Stats(os.path.join(self.directory, self.profiles()[0]))
+    # Both requests were added to the same profile.
+    calls = [value[0] for func, value in stats.stats.items() if func[2] == "dispatch" and "rest_framework" in func[0]]
+    self.assertEqual(calls, [2])
+
+  def test_superuser_header_profiles_one_request(self):
+    """Test that only superusers can profile a single request with the header."""
+    with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0.0):
+      client = APIClient()
+      response = client.get("/api/v1/tasks", HTTP_X_PROFILE="1", **self.auth)
+      self.assertNotIn("X-Profile", response)
+      self.user.is_superuser = True
+      self.user.save()
+      response = client.get("/api/v1/tasks", HTTP_X_PROFILE="1", **self.auth)
+    self.assertIn(response["X-Profile"], self.profiles("request-*.prof"))
+
+  def test_profiling_command(self):
+    """Test that 'profiling start' samples the URL names and 'report' merges them."""
+    with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0.0):
+      call_command("profiling", "start", "task-list-create", "--sample-rate", "1", stdout=io.StringIO())
+      APIClient().get("/api/v1/tasks", **self.auth)
+      out = io.StringIO()
+      call_command("profiling", "report", stdout=out)
+      self.assertIn("== task-list-create (1 workers)", out.getvalue())
+      call_command("profiling", "stop", stdout=io.StringIO())
+      call_command("profiling", "clear", stdout=io.StringIO())
+    self.assertEqual(self.profiles(), [])
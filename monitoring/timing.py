@@ -0,0 +1,72 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Timing of the request being served. A context variable rather than a
+# thread-local, so that it follows async requests into the threads that run
+# their ORM calls.
+current_timing = ContextVar("current_timing", default=None)
+
+
+class RequestTiming:
+  """
+  Time spent in the parts of one request.
+
+  Attributes:
+    spans (dict): Seconds spent per named span (auth, view, render, ...).
+    queries (int): Number of SQL queries executed.
+    db_time (float): Seconds spent executing them.
+    view_started (float): perf_counter() when the view was called.
+    view_ended (float): perf_counter() when the view returned a response
+      still to be rendered.
+  """
+
+  def __init__(self):
+    self.started = time.perf_counter()
+    self.spans = {}
+    self.queries = 0
+    self.db_time = 0.0
+    self.view_started = None
+    self.view_ended = None
+
+  def add(self, name, seconds):
+    self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+@contextmanager
+def span(name):
+  """Add the time spent in the block to the named span of the current request."""
+  timing = current_timing.get()
+  if timing is None:
+    yield
+    return
+  start = time.perf_counter()
+  try:
+    yield
+  finally:
+    timing.add(name, time.perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+  """
+  Database execute wrapper counting the queries of the current request.
+
+  Installed on every database connection when it is opened (see
+  MonitoringConfig.ready()), which is what `connection.execute_wrapper()`
+  does for the duration of a block.
+  """
+  timing = current_timing.get()
+  if timing is None:
+    return execute(sql, params, many, context)
+  start = time.perf_counter()
+  try:
+    return execute(sql, params, many, context)
+  finally:
+    timing.queries += 1
+    timing.db_time += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+  """connection_created receiver adding record_query() to the connection."""
+  if record_query not in connection.execute_wrappers:
+    connection.execute_wrappers.append(record_query)
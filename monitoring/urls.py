@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import DatabaseStatsView
+
+urlpatterns = [
+  path('monitoring/db', DatabaseStatsView.as_view(), name='monitoring-db-stats'), # Database connection pool statistics
+]
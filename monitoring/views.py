@@ -0,0 +1,57 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from utils.permissions import IsSuperUser
+
+from .db import database_stats
+from .metrics import render_metrics
+
+
+class DatabaseStatsView(APIView):
+  """
+  API endpoint exposing database connection and pool statistics.
+  """
+  permission_classes = [IsSuperUser]
+
+  def get(self, request):
+      """
+      GET request to read the connection statistics of the default database.
+
+      Args:
+        request: HTTP request object.
+
+      Returns:
+        Response: Pool usage (in use, idle, waiting, wait time) of the serving
+          process and the connection usage of the database server.
+      """
+      return Response(database_stats(), status=status.HTTP_200_OK)
+
+
+def metrics_view(request):
+  """
+  Serve the application metrics in the Prometheus text format.
+
+  Scrapers must send METRICS_TOKEN as a bearer token. Without a token
+  configured, the metrics are only served when DEBUG is on.
+
+  Args:
+    request: HTTP request object.
+
+  Returns:
+    HttpResponse: Metrics of all workers, 401 without a valid token, or
+      404 if no token is configured outside DEBUG.
+  """
+  token = settings.METRICS_TOKEN
+  if not token and not settings.DEBUG:
+    return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+  if token:
+    header = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+      return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+  body, content_type = render_metrics()
+  return HttpResponse(body, content_type=content_type)
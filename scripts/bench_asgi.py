@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Compare task API throughput of the WSGI and ASGI deployments at high concurrency.
+
+Start both servers against the same database, e.g.
+
+    gunicorn config.wsgi:application --workers 2 --bind :8000
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker --workers 2 --bind :8001
+
+then run
+
+    python3 scripts/bench_asgi.py --target wsgi=http://localhost:8000 --target asgi=http://localhost:8001
+
+The script registers (or reuses) a benchmark account, seeds it with tasks
+through the bulk-create endpoint, and fires GET requests at every
+concurrency level against each target. It only needs the standard library.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def request(conn, method, path, body=None, token=None):
+  headers = {"Content-Type": "application/json"}
+  if token:
+    headers["Authorization"] = f"Bearer {token}"
+  conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+  response = conn.getresponse()
+  data = response.read()
+  return response.status, data
+
+
+def connect(base_url):
+  parts = urlsplit(base_url)
+  conn_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+  return conn_class(parts.netloc, timeout=60)
+
+
+def login(base_url, email, password, seed_tasks):
+  """Register the benchmark account if needed, seed it and return an access token."""
+  conn = connect(base_url)
+  request(conn, "POST", "/api/v1/users/register", {"name": "Bench", "email": email, "password": password})
+  status, data = request(conn, "POST", "/api/v1/users/login", {"email": email, "password": password})
+  if status != 200:
+    raise SystemExit(f"Login failed on {base_url}: {status} {data[:200]!r}")
+  token = json.loads(data)["access"]
+
+  status, data = request(conn, "GET", "/api/v1/tasks?page_size=1", token=token)
+  if status == 200 and not json.loads(data)["results"]:
+    tasks = [{"title": f"Bench task {i}", "description": "benchmark"} for i in range(seed_tasks)]
+    request(conn, "POST", "/api/v1/tasks/bulk-create", tasks, token=token)
+  return token
+
+
+def run_level(base_url, path, token, concurrency, total_requests):
+  """Send total_requests GETs from `concurrency` keep-alive connections."""
+  latencies, errors = [], []
+  lock = threading.Lock()
+  remaining = [total_requests]
+
+  def worker():
+    conn = connect(base_url)
+    while True:
+      with lock:
+        if remaining[0] <= 0:
+          return
+        remaining[0] -= 1
+      start = time.perf_counter()
+      try:
+        status, _ = request(conn, "GET", path, token=token)
+      except (OSError, http.client.HTTPException) as exc:
+        conn.close()
+        conn = connect(base_url)
+        status = repr(exc)
+      elapsed = time.perf_counter() - start
+      with lock:
+        if status == 200:
+          latencies.append(elapsed)
+        else:
+          errors.append(status)
+
+  threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+  started = time.perf_counter()
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  duration = time.perf_counter() - started
+
+  quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+  return {
+    "concurrency": concurrency,
+    "requests": total_requests,
+    "errors": len(errors),
+    "throughput_rps": len(latencies) / duration,
+    "p50_ms": quantiles[49] * 1000,
+    "p99_ms": quantiles[98] * 1000,
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--target", action="append", required=True, help="name=base_url, repeatable")
+  parser.add_argument("--path", default="/api/v1/tasks?page_size=50")
+  parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256])
+  parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+  parser.add_argument("--seed-tasks", type=int, default=500)
+  parser.add_argument("--email", default="bench-asgi@example.com")
+  parser.add_argument("--password", default="bench-password-123")
+  parser.add_argument("--output", help="Write the results as JSON to this file")
+  args = parser.parse_args()
+
+  results = {}
+  for target in args.target:
+    name, base_url = target.split("=", 1)
+    token = login(base_url, args.email, args.password, args.seed_tasks)
+    results[name] = [
+      run_level(base_url, args.path, token, concurrency, args.requests)
+      for concurrency in args.concurrency
+    ]
+
+  print(f"{'target':<8} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+  for name, levels in results.items():
+    for level in levels:
+      print(
+        f"{name:<8} {level['concurrency']:>5} {level['throughput_rps']:>9.1f} "
+        f"{level['p50_ms']:>9.1f} {level['p99_ms']:>9.1f} {level['errors']:>7}"
+      )
+
+  if args.output:
+    with open(args.output, "w") as fh:
+      json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+  main()
@@ -51,7 +51,7 @@ todo_list=$(curl -s -X GET "$BASE_URL/tasks" \
 echo "TODO List: $todo_list"
 
 # Update the first TODO item
-TODO_ID=$(echo "$todo_list" | jq -r '.[0].id')
+TODO_ID=$(echo "$todo_list" | jq -r '.results[0].id')
 echo "Updating TODO with ID $TODO_ID..."
 update_response=$(curl -s -X PUT "$BASE_URL/tasks/$TODO_ID" \
   -H "Authorization: Bearer $ACCESS_TOKEN" \
@@ -68,7 +68,7 @@ status_update_response=$(curl -s -X PATCH "$BASE_URL/tasks/$TODO_ID/status" \
 echo "Status update response: $status_update_response"
 
 # Delete the last TODO item
-LAST_TODO_ID=$(echo "$todo_list" | jq -r '.[-1].id')
+LAST_TODO_ID=$(echo "$todo_list" | jq -r '.results[-1].id')
 echo "Deleting TODO with ID $LAST_TODO_ID..."
 delete_response=$(curl -s -X DELETE "$BASE_URL/tasks/$LAST_TODO_ID" \
   -H "Authorization: Bearer $ACCESS_TOKEN")
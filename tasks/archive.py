@@ -0,0 +1,98 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache, counters
+from .models import ArchivedTask, PurgedArchiveWatermark, Task
+
+# Columns copied from tasks to tasks_archive.
+ARCHIVED_FIELDS = ("id", "user_id", "title", "description", "status", "created_at", "updated_at")
+
+
+def days_ago(days):
+  return timezone.now() - timedelta(days=days)
+
+
+def archivable_tasks(cutoff):
+  """Return the soft-deleted tasks last updated (i.e. deleted) before the cutoff."""
+  return Task.objects.filter(is_deleted=True, updated_at__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size):
+  """
+  Move one batch of soft-deleted tasks to the tasks_archive table.
+
+  The oldest deleted tasks, read from the tasks_deleted_updated_idx index,
+  are copied to the archive, deleted from tasks and subtracted from their
+  owners' deleted counters in one short transaction. Rows locked by a
+  concurrent write are skipped (SELECT ... FOR UPDATE SKIP LOCKED) and left
+  for a later batch.
+
+  Args:
+    cutoff (datetime): Only tasks deleted before this time are moved.
+    batch_size (int): Maximum number of tasks moved.
+
+  Returns:
+    int: Number of tasks moved; 0 when there is nothing left to archive.
+  """
+  with transaction.atomic():
+    rows = list(
+      archivable_tasks(cutoff)
+      .select_for_update(skip_locked=True)
+      .order_by("updated_at", "id")
+      .values_list(*ARCHIVED_FIELDS)[:batch_size]
+    )
+    if not rows:
+      return 0
+    archived_at = timezone.now()
+    ArchivedTask.objects.bulk_create(
+      [ArchivedTask(archived_at=archived_at, **dict(zip(ARCHIVED_FIELDS, row))) for row in rows]
+    )
+    Task.objects.filter(id__in=[row[0] for row in rows]).delete()
+    per_user = Counter(row[1] for row in rows)
+    counters.apply_user_deltas("deleted", {user_id: -count for user_id, count in per_user.items()})
+  for user_id in per_user:
+    cache.bump_user_version(user_id)
+  return len(rows)
+
+
+def purge_batch(cutoff, batch_size):
+  """
+  Permanently delete one batch of tasks archived before the cutoff.
+
+  The position (updated_at, id) of the newest task purged is kept per user
+  as their purge watermark, in the same transaction, so delta sync cursors
+  before the purged tombstones keep expiring once the rows are gone.
+
+  Returns:
+    int: Number of archived tasks deleted; 0 when there is nothing left to purge.
+  """
+  with transaction.atomic():
+    rows = list(
+      ArchivedTask.objects.filter(archived_at__lt=cutoff)
+      .order_by("archived_at", "id")
+      .values_list("id", "user_id", "updated_at")[:batch_size]
+    )
+    if not rows:
+      return 0
+    purged = {}
+    for task_id, user_id, updated_at in rows:
+      purged[user_id] = max((updated_at, task_id), purged.get(user_id, (updated_at, task_id)))
+    watermarks = (
+      PurgedArchiveWatermark.objects.select_for_update()
+      .filter(user_id__in=purged)
+      .values_list("user_id", "purged_until", "purged_id")
+    )
+    for user_id, *position in watermarks:
+      purged[user_id] = max(tuple(position), purged[user_id])
+    PurgedArchiveWatermark.objects.bulk_create(
+      [
+        PurgedArchiveWatermark(user_id=user_id, purged_until=until, purged_id=task_id)
+        for user_id, (until, task_id) in purged.items()
+      ],
+      update_conflicts=True, unique_fields=["user"], update_fields=["purged_until", "purged_id"],
+    )
+    ArchivedTask.objects.filter(id__in=[row[0] for row in rows]).delete()
+  return len(rows)
@@ -0,0 +1,369 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, QueryDict
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+
+from users.auth.authentication import CachedJWTAuthentication
+
+from . import cache
+from .conditional import alist_etag, not_modified_response, set_validators, task_validators
+from .filters import filter_tasks
+from .models import Task
+from .operations import bulk_update_tasks, create_task, update_task
+from .pagination import TaskCursorPagination, query_params
+from .renderers import encode_json
+from .serializers import TaskSerializer, TaskStatusUpdateSerializer, TaskDeleteSerializer, TaskListFilterSerializer, TaskRowSerializer
+from .views import bulk_result, user_task, validate_bulk_status, validate_task_ids
+
+
+def json_response(data, status=status.HTTP_200_OK):
+  """Render data exactly as the DRF task views would."""
+  return HttpResponse(encode_json(data), status=status, content_type="application/json")
+
+
+def cached_json_response(request, entry, hit):
+  """Async-view counterpart of tasks.views.cached_response()."""
+  response = not_modified_response(request, entry["etag"], entry["last_modified"])
+  if response is None:
+    response = set_validators(json_response(entry["data"]), entry["etag"], entry["last_modified"])
+  response["X-Cache"] = "HIT" if hit else "MISS"
+  return response
+
+
+class AsyncAPIView(View):
+  """
+  Base class of the async task views.
+
+  Plays the part of DRF's APIView for native async handlers: authenticates
+  the request with the JWT access token, parses JSON and form bodies into
+  `request.data`, and renders APIExceptions the way DRF does. Only
+  authenticated requests reach the handlers.
+  """
+  authentication = CachedJWTAuthentication()
+
+  @classonlymethod
+  def as_view(cls, **initkwargs):
+    # Token authenticated, like the DRF views: no CSRF check.
+    return csrf_exempt(super().as_view(**initkwargs))
+
+  async def dispatch(self, request, *args, **kwargs):
+    try:
+      result = await self.authentication.aauthenticate(request)
+      if result is None:
+        raise exceptions.NotAuthenticated()
+      request.user, request.auth = result
+      request.data = self.parse_body(request)
+      return await super().dispatch(request, *args, **kwargs)
+    except exceptions.APIException as exc:
+      return self.handle_exception(request, exc)
+
+  def parse_body(self, request):
+    """
+    Parse the request body like DRF's JSON, form and multipart parsers.
+
+    Raises:
+      ParseError: If a JSON body is malformed.
+      UnsupportedMediaType: For any other content type.
+    """
+    if not request.body:
+      return {}
+    if request.content_type == "application/json":
+      try:
+        return json.loads(request.body)
+      except ValueError as exc:
+        raise exceptions.ParseError(f"JSON parse error - {exc}")
+    if request.content_type == "application/x-www-form-urlencoded":
+      return QueryDict(request.body, encoding=request.encoding)
+    if request.content_type == "multipart/form-data" and request.method == "POST":
+      return request.POST
+    raise exceptions.UnsupportedMediaType(request.content_type)
+
+  def handle_exception(self, request, exc):
+    """Render an APIException as DRF's default exception handler would."""
+    if isinstance(exc.detail, (list, dict)):
+      data = exc.detail
+    else:
+      data = {"detail": exc.detail}
+    response = json_response(data, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+      response["WWW-Authenticate"] = self.authentication.authenticate_header(request)
+    return response
+
+
+class AsyncTaskListCreateView(AsyncAPIView):
+  """
+  Async version of TaskListCreateView.
+  """
+
+  async def get(self, request):
+    """
+    GET request to list tasks for the authenticated user, one page at a time.
+
+    Args:
+      request: HTTP request object, optionally carrying 'cursor', 'page_size' and filters.
+
+    Returns:
+      HttpResponse: A page of serialized tasks and the link to the next page.
+    """
+    try:
+      cache_key = await cache.alist_key(request.user.pk, request)
+      entry = await cache.acache_get(cache_key)
+      if entry is not None:
+        return cached_json_response(request, entry, hit=True)
+
+      filters = TaskListFilterSerializer(data=query_params(request))
+      filters.is_valid(raise_exception=True)
+
+      todos = Task.objects.filter(user=request.user, is_deleted=False)
+      # Validators of the whole list: any change to it may change the filtered page.
+      etag = await alist_etag(todos, request)
+      not_modified = not_modified_response(request, etag, None)
+      if not_modified is not None:
+        return not_modified
+
+      todos = filter_tasks(todos, filters.validated_data)
+      paginator = TaskCursorPagination()
+      rows = todos.values_list(*TaskRowSerializer.fields, named=True)
+      page = await paginator.apaginate_queryset(rows, request, view=self)
+      entry = {
+        "data": paginator.get_paginated_data(TaskRowSerializer().many(page)),
+        "etag": etag,
+        "last_modified": None,
+      }
+      await cache.acache_set(cache_key, entry)
+      return cached_json_response(request, entry, hit=False)
+    except exceptions.APIException:
+      raise
+    except Exception as e:
+      return json_response(
+        {"error": "An error occurred while retrieving tasks."},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+      )
+
+  async def post(self, request):
+    """
+    POST request to create a new task for the authenticated user.
+
+    Args:
+      request: HTTP request object containing new task data.
+
+    Returns:
+      HttpResponse: Serialized data of the created task, or validation errors.
+    """
+    serializer = TaskSerializer(data=request.data)
+    if serializer.is_valid():
+      try:
+        task = await sync_to_async(create_task)(request.user, serializer.validated_data)
+        await cache.abump_user_version(request.user.pk)
+        return json_response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
+      except Exception as e:
+        return json_response(
+          {"error": "An error occurred while saving the task."},
+          status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncTaskDetailView(AsyncAPIView):
+  """
+  Async version of TaskDetailView.
+  """
+
+  async def get_object(self, pk, user):
+    """
+    Retrieve a live task by ID for a specific user.
+
+    Returns:
+      Task: The task object if found, or None.
+    """
+    try:
+      return await Task.objects.aget(id=pk, user=user, is_deleted=False)
+    except Task.DoesNotExist:
+      return None
+
+  async def get(self, request, pk):
+    """
+    GET request to retrieve a specific task.
+
+    Args:
+      request: HTTP request object.
+      pk (str): Primary key of the task.
+
+    Returns:
+      HttpResponse: Serialized task data or a 404 not found error.
+    """
+    cache_key = await cache.adetail_key(request.user.pk, pk)
+    entry = await cache.acache_get(cache_key)
+    if entry is not None:
+      return cached_json_response(request, entry, hit=True)
+
+    task = await self.get_object(pk, request.user)
+    if not task:
+      return json_response({"message": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+    etag, last_modified = task_validators(task)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+      return not_modified
+
+    entry = {"data": TaskSerializer(task).data, "etag": etag, "last_modified": last_modified}
+    await cache.acache_set(cache_key, entry)
+    return cached_json_response(request, entry, hit=False)
+
+  async def post(self, request, pk):
+    """
+    POST request to partially update a specific task.
+
+    Args:
+      request: HTTP request object containing partial task data.
+      pk (str): Primary key of the task.
+
+    Returns:
+      HttpResponse: Serialized updated task data or validation errors.
+    """
+    serializer = TaskSerializer(data=request.data, partial=True)
+    if not serializer.is_valid():
+      if not await user_task(request.user, pk).aexists():
+        return json_response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+      task = await sync_to_async(update_task)(request.user, pk, serializer.validated_data)
+      if not task:
+        return json_response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      await cache.abump_user_version(request.user.pk)
+      return json_response(TaskSerializer(task).data)
+    except Exception as e:
+      return json_response(
+        {"error": "An error occurred while updating the task."},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+      )
+
+  async def delete(self, request, pk):
+    """
+    DELETE request to perform a soft delete on a specific task.
+
+    Args:
+      request: HTTP request object.
+      pk (str): Primary key of the task.
+
+    Returns:
+      HttpResponse: Confirmation of deletion or 404 error if not found.
+    """
+    try:
+      task = await sync_to_async(update_task)(request.user, pk, {"is_deleted": True})
+      if not task:
+        return json_response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      await cache.abump_user_version(request.user.pk)
+      return json_response(TaskDeleteSerializer(task).data)
+    except Exception as e:
+      return json_response(
+        {"error": "An error occurred while deleting the task."},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+      )
+
+
+class AsyncTaskStatusUpdateView(AsyncAPIView):
+  """
+  Async version of TaskStatusUpdateView.
+  """
+
+  async def post(self, request, pk):
+    """
+    POST request to update the status of a specific task.
+
+    Args:
+      request: HTTP request object containing the new status.
+      pk (str): Primary key of the task.
+
+    Returns:
+      HttpResponse: Updated task data or a 404 not found error.
+    """
+    serializer = TaskStatusUpdateSerializer(data=request.data, partial=True)
+    if not serializer.is_valid():
+      if not await user_task(request.user, pk, include_deleted=True).aexists():
+        return json_response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+      task = await sync_to_async(update_task)(request.user, pk, serializer.validated_data, include_deleted=True)
+      if not task:
+        return json_response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      await cache.abump_user_version(request.user.pk)
+      return json_response(TaskStatusUpdateSerializer(task).data)
+    except Exception as e:
+      return json_response(
+        {"error": "An error occurred while updating the task status."},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+      )
+
+
+class AsyncBulkUpdateTaskStatusView(AsyncAPIView):
+  """
+  Async version of BulkUpdateTaskStatusView.
+
+  The chunked UPDATEs run in one transaction, which Django only offers to
+  sync code, so that part goes through sync_to_async.
+  """
+
+  async def post(self, request):
+    """
+    POST request to bulk update task statuses.
+
+    Args:
+      request: HTTP request object containing 'task_ids' and 'status'.
+
+    Returns:
+      HttpResponse: Summary of update results.
+    """
+    task_ids = request.data.get("task_ids")
+    status_to_update = request.data.get("status")
+
+    error = validate_task_ids(task_ids) or validate_bulk_status(status_to_update)
+    if error:
+      return json_response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+      updated_ids = await sync_to_async(bulk_update_tasks)(request.user, task_ids, status=status_to_update)
+      await cache.abump_user_version(request.user.pk)
+    except Exception as e:
+      return json_response(
+        {"error": "An error occurred while updating the tasks."},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+      )
+
+    return json_response(bulk_result(task_ids, updated_ids))
+
+
+class AsyncBulkDeleteTasksView(AsyncAPIView):
+  """
+  Async version of BulkDeleteTasksView.
+  """
+
+  async def delete(self, request):
+    """
+    DELETE request to perform a bulk soft-delete on tasks.
+
+    Args:
+      request: HTTP request object containing 'task_ids'.
+
+    Returns:
+      HttpResponse: Summary of deletion results.
+    """
+    task_ids = request.data.get("task_ids")
+
+    error = validate_task_ids(task_ids)
+    if error:
+      return json_response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+      updated_ids = await sync_to_async(bulk_update_tasks)(request.user, task_ids, is_deleted=True)
+      await cache.abump_user_version(request.user.pk)
+    except Exception as e:
+      return json_response(
+        {"error": "An error occurred while deleting the tasks."},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+      )
+
+    return json_response(bulk_result(task_ids, updated_ids))
@@ -0,0 +1,168 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from monitoring.metrics import record_cache
+
+
+class CacheStats:
+  """
+  Process-local hit/miss counters for the task read cache.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+  def record(self, hit):
+    with self._lock:
+      if hit:
+        self.hits += 1
+      else:
+        self.misses += 1
+
+  def as_dict(self):
+    with self._lock:
+      hits, misses = self.hits, self.misses
+    total = hits + misses
+    return {
+      "hits": hits,
+      "misses": misses,
+      "hit_ratio": hits / total if total else 0.0,
+    }
+
+
+stats = CacheStats()
+
+
+def get_cache():
+  return caches[settings.TASKS_CACHE_ALIAS]
+
+
+def is_enabled():
+  """
+  Return whether task reads are cached.
+
+  Versions live in the cache, so a process-local cache (LocMemCache) is
+  only used by a single worker: with several, a write handled by one of
+  them would not invalidate what the others cached.
+  """
+  return settings.TASKS_CACHE_WORKERS <= 1 or not isinstance(get_cache(), LocMemCache)
+
+
+def _version_key(user_id):
+  return f"tasks:version:{user_id}"
+
+
+def get_user_version(user_id):
+  """
+  Return the current cache version of the user's tasks.
+
+  A missing version (never set, or evicted) is initialised from the clock
+  rather than from 1, so an evicted version can never make entries written
+  under an older version readable again.
+  """
+  cache = get_cache()
+  key = _version_key(user_id)
+  version = cache.get(key)
+  if version is None:
+    cache.add(key, time.time_ns(), timeout=None)
+    version = cache.get(key)
+  return version
+
+
+async def aget_user_version(user_id):
+  """Async version of get_user_version()."""
+  cache = get_cache()
+  key = _version_key(user_id)
+  version = await cache.aget(key)
+  if version is None:
+    await cache.aadd(key, time.time_ns(), timeout=None)
+    version = await cache.aget(key)
+  return version
+
+
+def bump_user_version(user_id):
+  """
+  Invalidate every cached task read of the user.
+
+  Called by every write path; entries written under older versions are
+  simply never read again and expire on their own.
+  """
+  cache = get_cache()
+  try:
+    cache.incr(_version_key(user_id))
+  except ValueError:
+    cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+async def abump_user_version(user_id):
+  """Async version of bump_user_version()."""
+  cache = get_cache()
+  try:
+    await cache.aincr(_version_key(user_id))
+  except ValueError:
+    await cache.aset(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def _list_key(user_id, version, request):
+  query = f"{request.get_host()}{request.get_full_path()}"
+  digest = hashlib.md5(query.encode("utf-8")).hexdigest()
+  return f"tasks:{user_id}:{version}:list:{digest}"
+
+
+def list_key(user_id, request):
+  """Build the cache key of a task list page for the request's query string."""
+  return _list_key(user_id, get_user_version(user_id), request)
+
+
+async def alist_key(user_id, request):
+  """Async version of list_key()."""
+  return _list_key(user_id, await aget_user_version(user_id), request)
+
+
+def detail_key(user_id, task_id):
+  """Build the cache key of a single task."""
+  return f"tasks:{user_id}:{get_user_version(user_id)}:detail:{task_id}"
+
+
+async def adetail_key(user_id, task_id):
+  """Async version of detail_key()."""
+  return f"tasks:{user_id}:{await aget_user_version(user_id)}:detail:{task_id}"
+
+
+def _record(value):
+  stats.record(value is not None)
+  record_cache("tasks", value is not None)
+  return value
+
+
+def cache_get(key):
+  """Read a cached task payload and record the hit or miss; None if the cache is disabled."""
+  if not is_enabled():
+    return None
+  return _record(get_cache().get(key))
+
+
+async def acache_get(key):
+  """Async version of cache_get()."""
+  if not is_enabled():
+    return None
+  return _record(await get_cache().aget(key))
+
+
+def cache_set(key, value):
+  """Cache a task payload for TASKS_CACHE_TIMEOUT seconds, unless the cache is disabled."""
+  if is_enabled():
+    get_cache().set(key, value, timeout=settings.TASKS_CACHE_TIMEOUT)
+
+
+async def acache_set(key, value):
+  """Async version of cache_set()."""
+  if is_enabled():
+    await get_cache().aset(key, value, timeout=settings.TASKS_CACHE_TIMEOUT)
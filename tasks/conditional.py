@@ -0,0 +1,89 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def _etag(*parts):
+  digest = hashlib.md5(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+  return quote_etag(digest)
+
+
+LIST_AGGREGATES = {"last_modified": Max("updated_at"), "count": Count("id")}
+
+
+def list_etag(queryset, request):
+  """
+  Compute the ETag of a task list without reading its rows.
+
+  It is derived from a single `max(updated_at)`/`count(*)` aggregate over
+  the user's live tasks: every write bumps `updated_at` or changes the
+  count. The query string is part of the ETag, so every page has its own.
+
+  Lists carry no Last-Modified: a soft delete takes a task out of the list
+  without raising `max(updated_at)` over the live tasks, and the header's
+  one-second resolution would hide writes made within the same second.
+
+  Args:
+    queryset: The user's live tasks.
+    request: HTTP request of the list.
+
+  Returns:
+    str: The ETag of the list.
+  """
+  return _list_etag(queryset.aggregate(**LIST_AGGREGATES), request)
+
+
+async def alist_etag(queryset, request):
+  """Async version of list_etag()."""
+  return _list_etag(await queryset.aaggregate(**LIST_AGGREGATES), request)
+
+
+def _list_etag(aggregate, request):
+  last_modified = aggregate["last_modified"]
+  return _etag(
+    request.get_full_path(),
+    aggregate["count"],
+    last_modified.isoformat() if last_modified else "",
+  )
+
+
+def task_validators(task):
+  """
+  Compute the ETag and Last-Modified of a single task from its `updated_at`.
+
+  Returns:
+    tuple: (etag, last_modified) where last_modified is a POSIX timestamp.
+  """
+  return _etag(task.id, task.updated_at.isoformat()), task.updated_at.timestamp()
+
+
+def not_modified_response(request, etag, last_modified):
+  """
+  Return a 304 response if the request's If-None-Match/If-Modified-Since match.
+
+  Args:
+    request: HTTP request carrying the conditional headers.
+    etag (str): Current ETag of the resource.
+    last_modified (float): Current modification timestamp, or None.
+
+  Returns:
+    HttpResponseNotModified: If the client copy is current, else None.
+  """
+  response = get_conditional_response(
+    request,
+    etag=etag,
+    last_modified=int(last_modified) if last_modified is not None else None,
+  )
+  if response is not None:
+    set_validators(response, etag, last_modified)
+  return response
+
+
+def set_validators(response, etag, last_modified):
+  """Set the ETag and Last-Modified headers on the response."""
+  response["ETag"] = etag
+  if last_modified is not None:
+    response["Last-Modified"] = http_date(last_modified)
+  return response
@@ -0,0 +1,159 @@
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+from .enums import TaskStatus
+from .models import Task, TaskCounter
+
+COUNTER_FIELDS = ("pending", "completed", "deleted")
+
+
+def bucket(status, is_deleted):
+  """Return the name of the counter a task with this status and deleted flag is counted in."""
+  return "deleted" if is_deleted else status.lower()
+
+
+def change(before, after):
+  """Return the counter deltas of a task moving from one bucket to another."""
+  deltas = Counter()
+  if before != after:
+    if before is not None:
+      deltas[before] -= 1
+    deltas[after] += 1
+  return deltas
+
+
+def bucket_sql(name, status, is_deleted):
+  """
+  Return the SQL expression, and its params, that is 1 if a row with the
+  given status and is_deleted columns is counted in the named counter, else 0.
+  """
+  if name == "deleted":
+    return f"CASE WHEN {is_deleted} THEN 1 ELSE 0 END", []
+  return f"CASE WHEN NOT {is_deleted} AND {status} = %s THEN 1 ELSE 0 END", [name.upper()]
+
+
+def deltas_sql(status, is_deleted, previous_status, previous_is_deleted):
+  """
+  Return the SQL select list, and its params, of the counter deltas of a
+  row whose status and is_deleted columns changed from the previous ones.
+  """
+  columns, params = [], []
+  for name in COUNTER_FIELDS:
+    after, after_params = bucket_sql(name, status, is_deleted)
+    before, before_params = bucket_sql(name, previous_status, previous_is_deleted)
+    columns.append(f"({after}) - ({before}) AS {name}")
+    params.extend(after_params + before_params)
+  return ", ".join(columns), params
+
+
+def apply_deltas(user_id, deltas):
+  """
+  Add the deltas to the user's counters with a single UPDATE.
+
+  Must run in the transaction of the task write it accounts for, so the
+  counters commit or roll back with it. The UPDATE locks the counter row
+  until then, which serializes the task writes of one user.
+
+  Args:
+    user_id (str): Owner of the tasks.
+    deltas (dict): Counter names and the numbers to add to them.
+  """
+  changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+  if not changes:
+    return
+  if TaskCounter.objects.filter(user_id=user_id).update(**changes):
+    return
+  # First write since the user has no counter row. Lock the user so
+  # concurrent first writes create the row one at a time, then count the
+  # tasks, this write included.
+  list(get_user_model().objects.select_for_update().filter(pk=user_id).values_list("pk"))
+  if not TaskCounter.objects.filter(user_id=user_id).update(**changes):
+    recompute_counters([user_id])
+
+
+def apply_user_deltas(name, deltas):
+  """
+  Add a per-user delta to one counter of many users with a single UPDATE.
+
+  Like apply_deltas(), must run in the transaction of the task writes it
+  accounts for.
+
+  Args:
+    name (str): Name of the counter.
+    deltas (dict): User ids and the numbers to add to their counter.
+  """
+  deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+  if not deltas:
+    return
+  change = Case(
+    *[When(user_id=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+    default=Value(0),
+    output_field=IntegerField(),
+  )
+  updated = TaskCounter.objects.filter(user_id__in=deltas).update(**{name: F(name) + change})
+  if updated < len(deltas):
+    counted = TaskCounter.objects.filter(user_id__in=deltas).values_list("user_id", flat=True)
+    recompute_counters(list(set(deltas) - set(counted)))
+
+
+def count_tasks(user_ids=None):
+  """
+  Count the tasks of the users with a single GROUP BY over the tasks table.
+
+  Args:
+    user_ids (list): Users to count, or None for every user with tasks.
+
+  Yields:
+    TaskCounter: Unsaved counters of every user with tasks and, when
+      `user_ids` is given, zeroed counters of those without.
+  """
+  tasks = Task.objects.all() if user_ids is None else Task.objects.filter(user_id__in=user_ids)
+  rows = tasks.values("user_id").annotate(
+    pending=Count("id", filter=Q(is_deleted=False, status=TaskStatus.PENDING.value)),
+    completed=Count("id", filter=Q(is_deleted=False, status=TaskStatus.COMPLETED.value)),
+    deleted=Count("id", filter=Q(is_deleted=True)),
+  ).order_by()
+  missing = set(user_ids or ())
+  for row in rows.iterator(chunk_size=settings.TASKS_BULK_CHUNK_SIZE):
+    missing.discard(row["user_id"])
+    yield TaskCounter(**row)
+  for user_id in missing:
+    yield TaskCounter(user_id=user_id)
+
+
+def recompute_counters(user_ids=None):
+  """
+  Rebuild the task counters of the users from their tasks.
+
+  Args:
+    user_ids (list): Users to rebuild, or None for all of them.
+
+  Returns:
+    int: Number of counters written.
+  """
+  counters = count_tasks(user_ids)
+  written = 0
+  while batch := list(islice(counters, settings.TASKS_BULK_CHUNK_SIZE)):
+    TaskCounter.objects.bulk_create(
+      batch, update_conflicts=True, unique_fields=["user"], update_fields=COUNTER_FIELDS,
+    )
+    written += len(batch)
+  if user_ids is None:
+    # Users whose tasks are all gone.
+    TaskCounter.objects.exclude(user_id__in=Task.objects.values("user_id")).update(
+      **{name: 0 for name in COUNTER_FIELDS}
+    )
+  return written
+
+
+def get_counters(user_id):
+  """Return the task counters of the user, creating them on first read."""
+  counter = TaskCounter.objects.filter(user_id=user_id).first()
+  if counter is None:
+    recompute_counters([user_id])
+    counter = TaskCounter.objects.get(user_id=user_id)
+  return counter
@@ -0,0 +1,109 @@
+import csv
+import itertools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .renderers import render_ndjson_line
+from .serializers import TaskRowSerializer
+
+
+class Echo:
+  """File-like object whose write() hands the written value straight back."""
+
+  def write(self, value):
+    return value
+
+
+def iter_task_rows(queryset):
+  """
+  Lazily serialize every task in the queryset.
+
+  Rows are read as plain tuples through `.iterator()` (a server-side cursor
+  on PostgreSQL) and converted one at a time by TaskRowSerializer, so memory
+  stays flat whatever the size of the queryset.
+
+  Args:
+    queryset: Queryset of tasks to export.
+
+  Returns:
+    iterator: One dict per task, in the same shape as TaskSerializer output.
+  """
+  rows = queryset.order_by('created_at', 'id').values_list(*TaskRowSerializer.fields)
+  return TaskRowSerializer().iter(rows.iterator(chunk_size=settings.TASKS_EXPORT_CHUNK_SIZE))
+
+
+async def aiter_task_rows(queryset):
+  """
+  Async version of iter_task_rows().
+
+  The rows are read by the sync iterator one chunk at a time in Django's
+  sync thread, which keeps the server-side cursor on the same connection.
+  """
+  rows = iter_task_rows(queryset)
+  next_chunk = sync_to_async(lambda: list(itertools.islice(rows, settings.TASKS_EXPORT_CHUNK_SIZE)))
+  while chunk := await next_chunk():
+    for row in chunk:
+      yield row
+
+
+class CSVLines:
+  """Encoder of task rows as CSV lines, header first."""
+
+  def __init__(self):
+    self.writer = csv.writer(Echo())
+
+  def header(self):
+    return self.writer.writerow(TaskRowSerializer.fields).encode('utf-8')
+
+  def line(self, row):
+    return self.writer.writerow([row[name] for name in TaskRowSerializer.fields]).encode('utf-8')
+
+
+def chunked(lines):
+  """Join the lines into chunks of TASKS_EXPORT_CHUNK_SIZE lines."""
+  chunk = []
+  for line in lines:
+    chunk.append(line)
+    if len(chunk) >= settings.TASKS_EXPORT_CHUNK_SIZE:
+      yield b''.join(chunk)
+      chunk = []
+  if chunk:
+    yield b''.join(chunk)
+
+
+async def achunked(lines):
+  """Async version of chunked()."""
+  chunk = []
+  async for line in lines:
+    chunk.append(line)
+    if len(chunk) >= settings.TASKS_EXPORT_CHUNK_SIZE:
+      yield b''.join(chunk)
+      chunk = []
+  if chunk:
+    yield b''.join(chunk)
+
+
+def stream_ndjson(rows):
+  """Yield the rows as NDJSON, a chunk of lines at a time."""
+  return chunked(render_ndjson_line(row) for row in rows)
+
+
+async def astream_ndjson(rows):
+  """Async version of stream_ndjson(), over an async iterator of rows."""
+  async for chunk in achunked(render_ndjson_line(row) async for row in rows):
+    yield chunk
+
+
+def stream_csv(rows):
+  """Yield the rows as CSV with a header row, a chunk of lines at a time."""
+  encoder = CSVLines()
+  return chunked(itertools.chain([encoder.header()], (encoder.line(row) for row in rows)))
+
+
+async def astream_csv(rows):
+  """Async version of stream_csv(), over an async iterator of rows."""
+  encoder = CSVLines()
+  yield encoder.header()
+  async for chunk in achunked(encoder.line(row) async for row in rows):
+    yield chunk
@@ -0,0 +1,62 @@
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+# Must stay identical to the expression of the tasks_search_idx GIN index
+# (migration 0005), or PostgreSQL cannot use the index.
+SEARCH_DOCUMENT_SQL = "to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, ''))"
+
+RANGE_LOOKUPS = {
+  "created_after": "created_at__gte",
+  "created_before": "created_at__lt",
+  "updated_after": "updated_at__gte",
+  "updated_before": "updated_at__lt",
+}
+
+
+def search_tasks(queryset, text):
+  """
+  Keep the tasks whose title or description matches the search text.
+
+  On PostgreSQL this is a full-text search (`websearch_to_tsquery` syntax:
+  words, "quoted phrases", -excluded, or) served by the tasks_search_idx GIN
+  index. Elsewhere every word must appear in the title or the description,
+  case-insensitively.
+
+  Args:
+    queryset: Queryset of tasks.
+    text (str): Search text.
+
+  Returns:
+    QuerySet: The matching tasks.
+  """
+  if connections[queryset.db].vendor == "postgresql":
+    return queryset.filter(RawSQL(
+      f"{SEARCH_DOCUMENT_SQL} @@ websearch_to_tsquery('english'::regconfig, %s)",
+      [text],
+      output_field=BooleanField(),
+    ))
+  for word in text.split():
+    queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+  return queryset
+
+
+def filter_tasks(queryset, filters):
+  """
+  Apply the task list filters to a queryset of tasks.
+
+  Args:
+    queryset: Queryset of tasks.
+    filters (dict): Validated data of a TaskListFilterSerializer.
+
+  Returns:
+    QuerySet: The filtered tasks.
+  """
+  if filters.get("status"):
+    queryset = queryset.filter(status=filters["status"])
+  for name, lookup in RANGE_LOOKUPS.items():
+    if filters.get(name) is not None:
+      queryset = queryset.filter(**{lookup: filters[name]})
+  if filters.get("q"):
+    queryset = search_tasks(queryset, filters["q"])
+  return queryset
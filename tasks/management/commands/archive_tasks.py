@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.archive import archivable_tasks, archive_batch, days_ago, purge_batch
+from tasks.models import ArchivedTask
+
+# Seconds between two progress lines.
+PROGRESS_INTERVAL = 5.0
+
+
+class Command(BaseCommand):
+  help = (
+    "Move soft-deleted tasks older than the retention window to the "
+    "tasks_archive table, in short throttled batches, and optionally purge "
+    "old archived tasks. Every batch is its own transaction, so the command "
+    "can be stopped at any time and run again to resume."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument(
+      "--older-than-days", type=int, default=settings.TASKS_ARCHIVE_AFTER_DAYS,
+      help="Archive tasks deleted more than this many days ago.",
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.TASKS_ARCHIVE_BATCH_SIZE)
+    parser.add_argument(
+      "--delay", type=float, default=settings.TASKS_ARCHIVE_BATCH_DELAY,
+      help="Seconds to sleep between two batches.",
+    )
+    parser.add_argument("--max-batches", type=int, default=0, help="Stop after this many batches (0: no limit).")
+    parser.add_argument(
+      "--purge", action="store_true",
+      help="Also delete tasks archived more than TASKS_ARCHIVE_PURGE_AFTER_DAYS days ago.",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only count the tasks that would be moved.")
+
+  def handle(self, *args, **options):
+    if options["batch_size"] <= 0:
+      raise CommandError("--batch-size must be positive.")
+    self.options = options
+    # Fixed for the whole run, so it ends even while users keep deleting tasks.
+    cutoff = days_ago(options["older_than_days"])
+    purge_days = settings.TASKS_ARCHIVE_PURGE_AFTER_DAYS
+    purge_cutoff = days_ago(purge_days) if options["purge"] and purge_days > 0 else None
+
+    if options["dry_run"]:
+      self.stdout.write(f"{archivable_tasks(cutoff).count()} tasks to archive.")
+      if purge_cutoff is not None:
+        self.stdout.write(f"{ArchivedTask.objects.filter(archived_at__lt=purge_cutoff).count()} archived tasks to purge.")
+      return
+
+    try:
+      self.run("Archived", archive_batch, cutoff, archivable_tasks(cutoff).count())
+      if purge_cutoff is not None:
+        self.run("Purged", purge_batch, purge_cutoff, ArchivedTask.objects.filter(archived_at__lt=purge_cutoff).count())
+    except KeyboardInterrupt:
+      self.stdout.write("Interrupted; every finished batch is committed, run the command again to resume.")
+
+  def run(self, verb, batch, cutoff, expected):
+    """Run batches until nothing is left, reporting progress every PROGRESS_INTERVAL seconds."""
+    done = batches = 0
+    started = reported = time.monotonic()
+    try:
+      while not self.options["max_batches"] or batches < self.options["max_batches"]:
+        moved = batch(cutoff, self.options["batch_size"])
+        if not moved:
+          break
+        done += moved
+        batches += 1
+        now = time.monotonic()
+        if now - reported >= PROGRESS_INTERVAL:
+          reported = now
+          self.report(verb, done, expected, now - started)
+        if self.options["delay"]:
+          time.sleep(self.options["delay"])
+    finally:
+      self.report(verb, done, expected, time.monotonic() - started)
+
+  def report(self, verb, done, expected, elapsed):
+    percent = f" ({min(done / expected, 1) * 100:.1f}%)" if expected else ""
+    rate = done / elapsed if elapsed else 0.0
+    self.stdout.write(f"{verb} {done} of ~{expected} tasks{percent} in {elapsed:.1f}s, {rate:.0f} tasks/s.")
@@ -0,0 +1,255 @@
+import io
+import json
+import statistics
+import subprocess
+import threading
+import time
+from collections import deque
+from itertools import count
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.enums import TaskStatus
+from tasks.models import Task
+from utils.id_generator import encode_base36
+
+# Endpoints in the order they are run; bulk-delete goes last as it removes
+# tasks the others use.
+ENDPOINTS = [
+  "register", "login", "token-refresh", "list", "detail", "status",
+  "bulk-update-status", "bulk-delete",
+]
+
+BULK_UPDATE_SIZE = 100
+BULK_DELETE_SIZE = 10
+
+
+class QueryCounter:
+  """Database execute wrapper counting the queries of one thread."""
+
+  def __init__(self):
+    self.count = 0
+
+  def __call__(self, execute, sql, params, many, context):
+    self.count += 1
+    return execute(sql, params, many, context)
+
+
+class Session:
+  """A benchmark user with its tokens and task ids."""
+
+  def __init__(self, user, password, task_ids):
+    refresh = RefreshToken.for_user(user)
+    self.email = user.email
+    self.password = password
+    self.refresh = str(refresh)
+    self.auth = {"HTTP_AUTHORIZATION": f"Bearer {refresh.access_token}"}
+    self.task_ids = task_ids
+    self.deletable = deque(task_ids)
+    self.requests = count()
+
+
+def percentile_ms(quantiles, percent):
+  return round(quantiles[percent - 1] * 1000, 3)
+
+
+class Command(BaseCommand):
+  help = (
+    "Benchmark the auth and task endpoints through the full Django stack, at "
+    "every combination of --concurrency and --tasks-per-user. Reports "
+    "throughput, p50/p95/p99 latency and SQL queries per request, and can "
+    "write the results as JSON and compare them with an earlier run. "
+    "Benchmark users and their tasks are deleted when it finishes."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--tasks-per-user", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level.")
+    parser.add_argument("--password", default="bench-password-123")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with.")
+
+  def handle(self, *args, **options):
+    if connection.vendor == "sqlite" and connection.settings_dict["NAME"] == ":memory:":
+      raise CommandError("The benchmark needs a database shared between threads, not in-memory SQLite.")
+
+    self.options = options
+    self.domain = f"bench-{encode_base36(time.time_ns() // 1000, 10)}.example.com"
+    self.registrations = count()
+    results = []
+    try:
+      with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for tasks_per_user in options["tasks_per_user"]:
+          sessions = self.create_sessions(tasks_per_user)
+          for endpoint in options["endpoints"]:
+            for concurrency in options["concurrency"]:
+              result = self.run_endpoint(endpoint, sessions, concurrency)
+              result["tasks_per_user"] = tasks_per_user
+              results.append(result)
+              self.write_result(result)
+    finally:
+      self.cleanup()
+
+    report = {"meta": self.meta(), "results": results}
+    if options["output"]:
+      with open(options["output"], "w") as fh:
+        json.dump(report, fh, indent=2)
+    if options["compare"]:
+      self.compare(results, options["compare"])
+
+  def create_sessions(self, tasks_per_user):
+    """Generate the benchmark users and their tasks, and log them in."""
+    call_command(
+      "generate_dataset",
+      users=self.options["users"],
+      tasks_per_user=tasks_per_user,
+      password=self.options["password"],
+      email_domain=self.domain,
+      stdout=io.StringIO(),
+    )
+    users = get_user_model().objects.filter(email__endswith=f"@{self.domain}", tasks__isnull=False).distinct()
+    sessions = []
+    for user in users:
+      task_ids = list(Task.objects.filter(user=user, is_deleted=False).values_list("id", flat=True))
+      sessions.append(Session(user, self.options["password"], task_ids))
+    return sessions
+
+  def build_request(self, endpoint, session):
+    """Return (method, path, payload) of one request to the endpoint."""
+    number = next(session.requests)
+    task_id = session.task_ids[number % len(session.task_ids)] if session.task_ids else "tsk_missing"
+    if endpoint == "register":
+      email = f"register-{next(self.registrations)}@{self.domain}"
+      return "post", "/api/v1/users/register", {"name": "Bench", "email": email, "password": session.password}
+    if endpoint == "login":
+      return "post", "/api/v1/users/login", {"email": session.email, "password": session.password}
+    if endpoint == "token-refresh":
+      return "post", "/api/v1/users/login/token-refresh", {"refresh": session.refresh}
+    if endpoint == "list":
+      return "get", "/api/v1/tasks?page_size=100", None
+    if endpoint == "detail":
+      return "get", f"/api/v1/tasks/{task_id}", None
+    status = TaskStatus.COMPLETED.value if number % 2 else TaskStatus.PENDING.value
+    if endpoint == "status":
+      return "post", f"/api/v1/tasks/{task_id}/status", {"status": status}
+    if endpoint == "bulk-update-status":
+      return "post", "/api/v1/tasks/bulk-update-status", {"task_ids": session.task_ids[:BULK_UPDATE_SIZE], "status": status}
+    task_ids = []
+    while session.deletable and len(task_ids) < BULK_DELETE_SIZE:
+      task_ids.append(session.deletable.popleft())
+    return "delete", "/api/v1/tasks/bulk-delete", {"task_ids": task_ids or ["tsk_missing"]}
+
+  def run_endpoint(self, endpoint, sessions, concurrency):
+    """Send --requests requests to the endpoint from `concurrency` threads."""
+    latencies, errors, queries = [], [], []
+    lock = threading.Lock()
+    remaining = count()
+    total = self.options["requests"]
+
+    def worker():
+      client = Client()
+      counter = QueryCounter()
+      try:
+        with connection.execute_wrapper(counter):
+          while True:
+            number = next(remaining)
+            if number >= total:
+              return
+            session = sessions[number % len(sessions)]
+            method, path, payload = self.build_request(endpoint, session)
+            kwargs = dict(session.auth)
+            if payload is not None:
+              kwargs.update(data=json.dumps(payload), content_type="application/json")
+            counter.count = 0
+            start = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            elapsed = time.perf_counter() - start
+            with lock:
+              queries.append(counter.count)
+              if response.status_code < 400:
+                latencies.append(elapsed)
+              else:
+                errors.append(response.status_code)
+      finally:
+        connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    duration = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+      "endpoint": endpoint,
+      "concurrency": concurrency,
+      "requests": total,
+      "errors": len(errors),
+      "error_statuses": sorted(set(errors)),
+      "throughput_rps": round(len(latencies) / duration, 1),
+      "p50_ms": percentile_ms(quantiles, 50),
+      "p95_ms": percentile_ms(quantiles, 95),
+      "p99_ms": percentile_ms(quantiles, 99),
+      "queries_per_request": round(statistics.mean(queries), 2) if queries else 0.0,
+    }
+
+  def write_result(self, result):
+    self.stdout.write(
+      f"{result['endpoint']:<19} tasks/user {result['tasks_per_user']:>6}  conc {result['concurrency']:>3}  "
+      f"{result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:>8.1f}  p95 {result['p95_ms']:>8.1f}  "
+      f"p99 {result['p99_ms']:>8.1f} ms  queries {result['queries_per_request']:>5.1f}  errors {result['errors']}"
+    )
+
+  def compare(self, results, path):
+    """Print the throughput, p95 and query count changes against an earlier run."""
+    with open(path) as fh:
+      baseline = {
+        (result["endpoint"], result["tasks_per_user"], result["concurrency"]): result
+        for result in json.load(fh)["results"]
+      }
+    self.stdout.write(f"\nCompared with {path}:")
+    for result in results:
+      before = baseline.get((result["endpoint"], result["tasks_per_user"], result["concurrency"]))
+      if before is None:
+        continue
+      throughput = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+      self.stdout.write(
+        f"{result['endpoint']:<19} tasks/user {result['tasks_per_user']:>6}  conc {result['concurrency']:>3}  "
+        f"req/s {throughput:>+7.1f}%  p95 {result['p95_ms'] - before['p95_ms']:>+8.1f} ms  "
+        f"queries {result['queries_per_request'] - before['queries_per_request']:>+5.1f}"
+      )
+
+  def meta(self):
+    try:
+      commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+      ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+      commit = None
+    return {
+      "commit": commit,
+      "vendor": connection.vendor,
+      "timestamp": timezone.now().isoformat(),
+      "users": self.options["users"],
+      "requests": self.options["requests"],
+    }
+
+  def cleanup(self):
+    """Delete the benchmark users, their tasks and their tokens."""
+    users = get_user_model().objects.filter(email__endswith=f"@{self.domain}")
+    OutstandingToken.objects.filter(user__in=users).delete()
+    users.delete()
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+
+from utils.id_generator import generate_custom_task_id, generate_sortable_task_id
+
+
+class Rollback(Exception):
+  """Raised to discard the benchmark tables."""
+
+
+GENERATORS = {
+  "random": generate_custom_task_id,
+  "sortable": generate_sortable_task_id,
+}
+
+
+class Command(BaseCommand):
+  help = (
+    "Compare insert rate and primary key index size of random task ids "
+    "against time-ordered ones. Each generator fills its own table with "
+    "the same rows; the tables are created in a transaction that is rolled "
+    "back."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+
+  def handle(self, *args, **options):
+    try:
+      with transaction.atomic():
+        for name, generator in GENERATORS.items():
+          self.run_generator(name, generator, options["rows"], options["batch_size"])
+        raise Rollback
+    except Rollback:
+      pass
+
+  def run_generator(self, name, generator, rows, batch_size):
+    table = connection.ops.quote_name(f"bench_ids_{name}")
+    ids = [generator() for _ in range(rows)]
+    with connection.cursor() as cursor:
+      cursor.execute(f"CREATE TABLE {table} (id varchar(16) PRIMARY KEY, title varchar(255) NOT NULL)")
+      sql = f"INSERT INTO {table} (id, title) VALUES (%s, %s)"
+      start = time.perf_counter()
+      for offset in range(0, rows, batch_size):
+        cursor.executemany(sql, [(task_id, "Benchmark task") for task_id in ids[offset:offset + batch_size]])
+      elapsed = time.perf_counter() - start
+      index_size = self.index_size(cursor, f"bench_ids_{name}")
+
+    size = f"{index_size / 1024:>10.0f} KiB" if index_size is not None else "       n/a"
+    self.stdout.write(f"{name:>9}  {rows / elapsed:>10.0f} rows/s  index: {size}")
+
+  def index_size(self, cursor, table):
+    """Return the size in bytes of the table's indexes, if the backend reports it."""
+    if connection.vendor == "postgresql":
+      cursor.execute("SELECT pg_indexes_size(%s::regclass)", [table])
+      return cursor.fetchone()[0]
+    if connection.vendor == "sqlite":
+      try:
+        cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [f"sqlite_autoindex_{table}_1"])
+      except DatabaseError:
+        # SQLite built without the dbstat virtual table.
+        return None
+      return cursor.fetchone()[0]
+    return None
@@ -0,0 +1,70 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.renderers import TaskJSONRenderer
+from tasks.serializers import TaskRowSerializer, TaskSerializer
+
+
+class Rollback(Exception):
+  """Raised to discard the benchmark data."""
+
+
+class Command(BaseCommand):
+  help = (
+    "Compare rows/sec of TaskSerializer + JSONRenderer against the "
+    "TaskRowSerializer + TaskJSONRenderer fast path. Benchmark rows are "
+    "created in a transaction that is rolled back."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the best run is reported.")
+
+  def handle(self, *args, **options):
+    try:
+      with transaction.atomic():
+        user = get_user_model().objects.create_user(email="bench-serializers@example.com", password=None)
+        created = 0
+        for size in sorted(options["sizes"]):
+          Task.objects.bulk_create(
+            [Task(user=user, title=f"Task {i}", description="Benchmark task " * 4) for i in range(created, size)],
+            batch_size=1000,
+          )
+          created = max(created, size)
+          self.run_size(user, size, options["repeat"])
+        raise Rollback
+    except Rollback:
+      pass
+
+  def run_size(self, user, size, repeat):
+    tasks = Task.objects.filter(user=user, is_deleted=False).order_by("created_at", "id")[:size]
+
+    def serializer_path():
+      return JSONRenderer().render(TaskSerializer(tasks, many=True).data)
+
+    def fast_path():
+      rows = tasks.values_list(*TaskRowSerializer.fields)
+      return TaskJSONRenderer().render(TaskRowSerializer().many(rows))
+
+    if serializer_path() != fast_path():
+      raise CommandError("Fast path output differs from TaskSerializer output.")
+
+    baseline = self.best_of(serializer_path, repeat)
+    fast = self.best_of(fast_path, repeat)
+    self.stdout.write(
+      f"{size:>8} rows  serializer: {size / baseline:>10.0f} rows/s  "
+      f"fast path: {size / fast:>10.0f} rows/s  speedup: {baseline / fast:.1f}x"
+    )
+
+  def best_of(self, func, repeat):
+    timings = []
+    for _ in range(repeat):
+      start = time.perf_counter()
+      func()
+      timings.append(time.perf_counter() - start)
+    return min(timings)
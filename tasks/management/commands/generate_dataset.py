@@ -0,0 +1,195 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from tasks.enums import TaskStatus
+from tasks.counters import recompute_counters
+from tasks.models import Task
+from tasks.operations import chunked
+from utils.id_generator import SortableIdGenerator, encode_base36
+
+TITLE_WORDS = [
+  "review", "write", "fix", "plan", "call", "email", "update", "deploy", "test",
+  "design", "report", "invoice", "meeting", "notes", "budget", "release", "draft",
+]
+
+
+@contextmanager
+def raw_timestamps(model, *names):
+  """Let generated timestamps through the named auto_now(_add) fields."""
+  fields = [model._meta.get_field(name) for name in names]
+  saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+  for field in fields:
+    field.auto_now = field.auto_now_add = False
+  try:
+    yield
+  finally:
+    for field, auto_now, auto_now_add in saved:
+      field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Clock:
+  """Settable clock, so generated ids carry the generated creation time."""
+
+  def __init__(self):
+    self.ns = 0
+
+  def set(self, moment):
+    self.ns = int(moment.timestamp() * 1_000_000_000)
+
+  def __call__(self):
+    return self.ns
+
+
+class Command(BaseCommand):
+  help = (
+    "Generate N users with M tasks each, with spread-out creation times, "
+    "completed and soft-deleted tasks, and time-ordered ids like the ones "
+    "issued in production. Tasks are written with COPY on PostgreSQL and "
+    "with batched bulk_create elsewhere."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks-per-user", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365, help="Spread creation times over this many past days.")
+    parser.add_argument("--completed-ratio", type=float, default=0.6)
+    parser.add_argument("--deleted-ratio", type=float, default=0.05)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--method", choices=["auto", "copy", "bulk"], default="auto")
+    parser.add_argument("--password", default="password123", help="Password of every generated user.")
+    parser.add_argument("--email-domain", default="example.com")
+    parser.add_argument("--seed", type=int, default=None)
+
+  def handle(self, *args, **options):
+    method = options["method"]
+    if method == "auto":
+      method = "copy" if connection.vendor == "postgresql" else "bulk"
+    if method == "copy" and connection.vendor != "postgresql":
+      raise CommandError("COPY is only available on PostgreSQL.")
+
+    self.random = random.Random(options["seed"])
+    self.now = timezone.now()
+    self.options = options
+    self.write_tasks = self.copy_tasks if method == "copy" else self.bulk_create_tasks
+
+    start = time.perf_counter()
+    users = self.create_users()
+    task_count = self.create_tasks(users)
+    # The tasks were loaded behind the ORM's back: count them once.
+    for chunk in chunked([user.pk for user in users], self.options["batch_size"]):
+      recompute_counters(chunk)
+    elapsed = time.perf_counter() - start
+    self.stdout.write(
+      f"Created {len(users)} users and {task_count} tasks in {elapsed:.1f}s "
+      f"({task_count / elapsed:.0f} tasks/s, {method})."
+    )
+
+  def create_users(self):
+    """Create the users in join order; they all share one password hash."""
+    User = get_user_model()
+    password = make_password(self.options["password"])
+    # Tag the emails of this run, so the command can be run again.
+    run = encode_base36(int(self.now.timestamp()), 6)
+    days = self.options["days"]
+    joined = sorted(self.now - timedelta(days=days * self.random.random()) for _ in range(self.options["users"]))
+
+    clock = Clock()
+    ids = SortableIdGenerator(clock=clock)
+    users = []
+    for number, date_joined in enumerate(joined):
+      clock.set(date_joined)
+      users.append(User(
+        id=ids.generate("usr_", 16),
+        name=f"Dataset User {number}",
+        email=f"dataset-{run}-{number}@{self.options['email_domain']}",
+        password=password,
+        date_joined=date_joined,
+      ))
+    with raw_timestamps(User, "date_joined"):
+      User.objects.bulk_create(users, batch_size=self.options["batch_size"])
+    return users
+
+  def create_tasks(self, users):
+    """Generate every user's tasks and write them in batches."""
+    batch, total = [], 0
+    batch_size = self.options["batch_size"]
+    for user in users:
+      batch.extend(self.generate_tasks(user))
+      while len(batch) >= batch_size:
+        self.write_tasks(batch[:batch_size])
+        total += batch_size
+        batch = batch[batch_size:]
+        if self.options["verbosity"] > 1:
+          self.stdout.write(f"{total} tasks written")
+    if batch:
+      self.write_tasks(batch)
+      total += len(batch)
+    return total
+
+  def generate_tasks(self, user):
+    """
+    Generate the tasks of one user as rows of TASK_COLUMNS.
+
+    Creation times fall between the user's join date and now, skewed
+    towards recent days. Completed and deleted tasks were updated some time
+    after they were created; a third of the pending ones were edited.
+    """
+    rand = self.random
+    lifetime = (self.now - user.date_joined).total_seconds()
+    created = sorted(
+      self.now - timedelta(seconds=lifetime * rand.random() ** 2)
+      for _ in range(self.options["tasks_per_user"])
+    )
+
+    clock = Clock()
+    ids = SortableIdGenerator(clock=clock)
+    rows = []
+    for created_at in created:
+      clock.set(created_at)
+      completed = rand.random() < self.options["completed_ratio"]
+      deleted = rand.random() < self.options["deleted_ratio"]
+      updated_at = created_at
+      if completed or deleted or rand.random() < 0.33:
+        updated_at = min(created_at + timedelta(seconds=rand.expovariate(1 / 172800)), self.now)
+      words = rand.sample(TITLE_WORDS, rand.randint(2, 4))
+      rows.append((
+        ids.generate("tsk_", 16),
+        user.pk,
+        " ".join(words).capitalize(),
+        f"Generated task about {words[0]}." if rand.random() < 0.7 else "",
+        TaskStatus.COMPLETED.value if completed else TaskStatus.PENDING.value,
+        deleted,
+        created_at,
+        updated_at,
+      ))
+    return rows
+
+  def bulk_create_tasks(self, rows):
+    tasks = [
+      Task(id=task_id, user_id=user_id, title=title, description=description, status=status,
+           is_deleted=is_deleted, created_at=created_at, updated_at=updated_at)
+      for task_id, user_id, title, description, status, is_deleted, created_at, updated_at in rows
+    ]
+    with raw_timestamps(Task, "created_at", "updated_at"):
+      Task.objects.bulk_create(tasks)
+
+  def copy_tasks(self, rows):
+    opts = Task._meta
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(quote_name(opts.get_field(name).column) for name in TASK_COLUMNS)
+    with connection.cursor() as cursor:
+      with cursor.copy(f"COPY {quote_name(opts.db_table)} ({columns}) FROM STDIN") as copy:
+        for row in rows:
+          copy.write_row(row)
+
+
+# Field order of the rows built by generate_tasks().
+TASK_COLUMNS = ["id", "user", "title", "description", "status", "is_deleted", "created_at", "updated_at"]
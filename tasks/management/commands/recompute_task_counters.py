@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.counters import COUNTER_FIELDS, count_tasks, recompute_counters
+from tasks.models import TaskCounter
+
+
+class Command(BaseCommand):
+  help = (
+    "Rebuild the per-user task counters behind GET /api/v1/tasks/stats from "
+    "the tasks table, with a single GROUP BY. Use --check to only report the "
+    "users whose counters have drifted."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument("--email", nargs="+", help="Only the users with these emails.")
+    parser.add_argument("--check", action="store_true", help="Report drifted counters without fixing them.")
+
+  def handle(self, *args, **options):
+    user_ids = None
+    if options["email"]:
+      user_ids = list(get_user_model().objects.filter(email__in=options["email"]).values_list("pk", flat=True))
+      if len(user_ids) != len(set(options["email"])):
+        raise CommandError("Some of the emails do not belong to any user.")
+
+    if options["check"]:
+      drifted = self.check_counters(user_ids)
+      self.stdout.write(f"{drifted} users with drifted counters.")
+      return
+
+    with transaction.atomic():
+      written = recompute_counters(user_ids)
+    self.stdout.write(f"Recomputed the counters of {written} users.")
+
+  def check_counters(self, user_ids):
+    """Compare the stored counters with the task counts and report the differences."""
+    stored = TaskCounter.objects.all() if user_ids is None else TaskCounter.objects.filter(user_id__in=user_ids)
+    stored = {counter.user_id: counter for counter in stored}
+    drifted = 0
+    for expected in count_tasks(user_ids):
+      actual = stored.pop(expected.user_id, None)
+      if actual is None or any(getattr(actual, name) != getattr(expected, name) for name in COUNTER_FIELDS):
+        drifted += 1
+        self.report(expected, actual)
+    # Counters of users without any task.
+    for actual in stored.values():
+      if any(getattr(actual, name) for name in COUNTER_FIELDS):
+        drifted += 1
+        self.report(TaskCounter(user_id=actual.user_id), actual)
+    return drifted
+
+  def report(self, expected, actual):
+    values = ", ".join(
+      f"{name} {getattr(actual, name) if actual else '-'} -> {getattr(expected, name)}"
+      for name in COUNTER_FIELDS
+    )
+    self.stdout.write(f"{expected.user_id}: {values}")
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_is_deleted'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', 'created_at', 'id'], name='tasks_user_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status'], name='tasks_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:23
+
+import utils.id_generator
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='id',
+            field=models.CharField(default=utils.id_generator.generate_sortable_task_id, editable=False, max_length=16, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+SEARCH_INDEX_SQL = (
+    "CREATE INDEX tasks_search_idx ON tasks USING gin "
+    "(to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '')))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    # GIN/tsvector indexes only exist on PostgreSQL; other backends search
+    # without an index (see tasks.filters.search_tasks).
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_INDEX_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS tasks_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_sortable_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', 'status', 'created_at', 'id'], name='tasks_user_live_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='tasks_user_updated_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Counters of the existing users, from a single GROUP BY over the tasks.
+BACKFILL_SQL = """
+INSERT INTO task_counters (user_id, pending, completed, deleted)
+SELECT user_id,
+       SUM(CASE WHEN NOT is_deleted AND status = 'PENDING' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN NOT is_deleted AND status = 'COMPLETED' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN is_deleted THEN 1 ELSE 0 END)
+FROM tasks
+GROUP BY user_id
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_filter_indexes'),
+        ('users', '0002_sortable_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pending', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('deleted', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'task_counters',
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_archive'),
+        ('users', '0002_sortable_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgedArchiveWatermark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='purged_archive_watermark', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('purged_until', models.DateTimeField()),
+                ('purged_id', models.CharField(max_length=16)),
+            ],
+            options={
+                'db_table': 'tasks_archive_purged',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:06
+
+import utils.id_generator
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_purged_archive_watermark'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedtask',
+            name='id',
+            field=models.CharField(editable=False, max_length=20, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='purgedarchivewatermark',
+            name='purged_id',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='id',
+            field=models.CharField(default=utils.id_generator.generate_sortable_task_id, editable=False, max_length=20, primary_key=True, serialize=False),
+        ),
+    ]
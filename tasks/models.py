@@ -1,12 +1,13 @@
 from django.db import models
+from django.utils import timezone
 from users.models import CustomUser
 
 from .enums import TaskStatus
-from utils.id_generator import generate_custom_task_id
+from utils.id_generator import generate_sortable_task_id
 
 
 class Task(models.Model):
-  id = models.CharField(max_length=16, primary_key=True, editable=False, default= generate_custom_task_id)
+  id = models.CharField(max_length=20, primary_key=True, editable=False, default= generate_sortable_task_id)
   user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="tasks")
   title = models.CharField(max_length=255)
   description = models.TextField(blank=True)
@@ -20,4 +21,95 @@ class Task(models.Model):
 
   class Meta:
     db_table = 'tasks'
+    indexes = [
+      # Live task list, paginated on (created_at, id).
+      models.Index(
+        fields=['user', 'created_at', 'id'],
+        condition=models.Q(is_deleted=False),
+        name='tasks_user_live_created_idx',
+      ),
+      # Per-user status lookups and counts.
+      models.Index(fields=['user', 'status'], name='tasks_user_status_idx'),
+      # Live task list filtered by status, paginated on (created_at, id).
+      models.Index(
+        fields=['user', 'status', 'created_at', 'id'],
+        condition=models.Q(is_deleted=False),
+        name='tasks_user_live_status_idx',
+      ),
+      # updated_at range filters.
+      models.Index(fields=['user', 'updated_at', 'id'], name='tasks_user_updated_idx'),
+      # Soft-deleted tasks due for archival, oldest deletion first.
+      models.Index(
+        fields=['updated_at', 'id'],
+        condition=models.Q(is_deleted=True),
+        name='tasks_deleted_updated_idx',
+      ),
+      # Full-text search over title and description is served by the
+      # PostgreSQL-only tasks_search_idx GIN index (migration 0005).
+    ]
 
+
+
+class TaskCounter(models.Model):
+  """
+  Number of pending, completed and deleted tasks of a user.
+
+  Kept in step by every task write (see tasks.counters), so the task stats
+  are read from one row instead of counting the user's tasks.
+  """
+  user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="task_counter")
+  pending = models.IntegerField(default=0)
+  completed = models.IntegerField(default=0)
+  deleted = models.IntegerField(default=0)
+
+  def __str__(self):
+      return f"{self.user_id}: {self.pending} pending, {self.completed} completed, {self.deleted} deleted"
+
+  @property
+  def total(self):
+    """Number of live tasks."""
+    return self.pending + self.completed
+
+  class Meta:
+    db_table = 'task_counters'
+
+
+class ArchivedTask(models.Model):
+  """
+  A soft-deleted task moved out of the tasks table by `manage.py archive_tasks`.
+
+  Keeps the task's columns as they were when it was archived; every
+  archived task was deleted, so there is no is_deleted flag.
+  """
+  id = models.CharField(max_length=20, primary_key=True, editable=False)
+  user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="archived_tasks")
+  title = models.CharField(max_length=255)
+  description = models.TextField(blank=True)
+  status = models.CharField(max_length=20, choices=[(status.value, status.value) for status in TaskStatus])
+  created_at = models.DateTimeField()
+  updated_at = models.DateTimeField()
+  archived_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+  def __str__(self):
+      return f"{self.title} - archived {self.archived_at:%Y-%m-%d}"
+
+  class Meta:
+    db_table = 'tasks_archive'
+
+
+class PurgedArchiveWatermark(models.Model):
+  """
+  Position (updated_at, id) of the newest archived task of the user purged so far.
+
+  Purged tombstones are gone for good, so a delta sync cursor before this
+  position can no longer be answered (see TaskChangesPagination).
+  """
+  user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="purged_archive_watermark")
+  purged_until = models.DateTimeField()
+  purged_id = models.CharField(max_length=20)
+
+  def __str__(self):
+      return f"{self.user_id}: purged until {self.purged_until:%Y-%m-%d}"
+
+  class Meta:
+    db_table = 'tasks_archive_purged'
@@ -0,0 +1,297 @@
+import copy
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters
+from .models import Task
+
+
+def chunked(items, size):
+  """Yield successive slices of at most `size` items."""
+  for start in range(0, len(items), size):
+    yield items[start:start + size]
+
+
+def create_task(user, validated_data):
+  """
+  Create a task for the user and count it in the user's counters.
+
+  Args:
+    user: Owner of the new task.
+    validated_data (dict): Validated task payload.
+
+  Returns:
+    Task: The created task.
+  """
+  with transaction.atomic():
+    task = Task.objects.create(user=user, **validated_data)
+    counters.apply_deltas(user.pk, {counters.bucket(task.status, task.is_deleted): 1})
+  return task
+
+
+def update_task(user, task_id, values, include_deleted=False):
+  """
+  Update the given columns of one task of the user, keeping the counters in step.
+
+  Only the given columns and `updated_at` are written. On PostgreSQL the
+  whole write, counters included, is a single statement and round trip
+  (see _update_task_returning()). Elsewhere the task is read with
+  SELECT ... FOR UPDATE first, so the status it is counted under cannot
+  change between the read and the write.
+
+  Args:
+    user: Owner of the task.
+    task_id (str): Id of the task.
+    values (dict): Field names and the values to set.
+    include_deleted (bool): Also update soft-deleted tasks.
+
+  Returns:
+    Task: The updated task, or None if the user has no such task.
+  """
+  values = dict(values, updated_at=timezone.now())
+  if connection.vendor == "postgresql":
+    return _update_task_returning(user, task_id, values, include_deleted)
+
+  queryset = Task.objects.select_for_update().filter(id=task_id, user=user)
+  if not include_deleted:
+    queryset = queryset.filter(is_deleted=False)
+  with transaction.atomic():
+    task = queryset.first()
+    if task is None:
+      return None
+    before = counters.bucket(task.status, task.is_deleted)
+    for name, value in values.items():
+      setattr(task, name, value)
+    task.save(update_fields=list(values))
+    counters.apply_deltas(user.pk, counters.change(before, counters.bucket(task.status, task.is_deleted)))
+  return task
+
+
+def _update_task_returning(user, task_id, values, include_deleted):
+  """
+  Update one task and its owner's counters with one data-modifying CTE.
+
+  `previous` locks the row and keeps its status and deleted flag, `updated`
+  writes the changed columns and returns the whole row, and `counted` adds
+  the resulting deltas to the counter row. Runs as one statement, so it is
+  atomic even in autocommit mode.
+  """
+  opts = Task._meta
+  quote_name = connection.ops.quote_name
+  table = quote_name(opts.db_table)
+  pk_column = quote_name(opts.pk.column)
+  status_column = quote_name(opts.get_field("status").column)
+  deleted_column = quote_name(opts.get_field("is_deleted").column)
+  fields = opts.concrete_fields
+  columns = [quote_name(field.column) for field in fields]
+
+  conditions = [f"{pk_column} = %s", f"{quote_name(opts.get_field('user').column)} = %s"]
+  params = [task_id, user.pk]
+  if not include_deleted:
+    conditions.append(f"{deleted_column} = %s")
+    params.append(False)
+
+  assignments = []
+  for name, value in values.items():
+    field = opts.get_field(name)
+    assignments.append(f"{quote_name(field.column)} = %s")
+    params.append(field.get_db_prep_save(value, connection))
+
+  deltas, delta_params = counters.deltas_sql(
+    status_column, deleted_column, "previous_status", "previous_is_deleted",
+  )
+  params.extend(delta_params)
+  counter_opts = counters.TaskCounter._meta
+  counter_table = quote_name(counter_opts.db_table)
+  counter_assignments = ", ".join(
+    f"{quote_name(name)} = {counter_table}.{quote_name(name)} + delta.{name}" for name in counters.COUNTER_FIELDS
+  )
+  counter_changed = " OR ".join(f"delta.{name} <> 0" for name in counters.COUNTER_FIELDS)
+  params.append(user.pk)
+
+  sql = (
+    f"WITH previous AS ("
+    f"SELECT {pk_column}, {status_column}, {deleted_column} FROM {table} "
+    f"WHERE {' AND '.join(conditions)} FOR UPDATE"
+    f"), updated AS ("
+    f"UPDATE {table} SET {', '.join(assignments)} FROM previous "
+    f"WHERE {table}.{pk_column} = previous.{pk_column} "
+    f"RETURNING {', '.join(f'{table}.{column}' for column in columns)}, "
+    f"previous.{status_column} AS previous_status, previous.{deleted_column} AS previous_is_deleted"
+    f"), counted AS ("
+    f"UPDATE {counter_table} SET {counter_assignments} "
+    f"FROM (SELECT {deltas} FROM updated) AS delta "
+    f"WHERE {counter_table}.{quote_name(counter_opts.get_field('user').column)} = %s AND ({counter_changed}) "
+    f"RETURNING 1"
+    f") SELECT {', '.join(f'updated.{column}' for column in columns)}, "
+    f"previous_status, previous_is_deleted, (SELECT count(*) FROM counted) FROM updated"
+  )
+  with connection.cursor() as cursor:
+    cursor.execute(sql, params)
+    row = cursor.fetchone()
+  if row is None:
+    return None
+
+  task = Task.from_db(connection.alias, [field.attname for field in fields], row[:len(fields)])
+  previous_status, previous_is_deleted, counted = row[len(fields):]
+  before = counters.bucket(previous_status, previous_is_deleted)
+  if counted == 0 and before != counters.bucket(task.status, task.is_deleted):
+    # The user has no counter row yet: count the tasks, this write included.
+    counters.recompute_counters([user.pk])
+  return task
+
+
+def run_batch(user, operations):
+  """
+  Apply an ordered list of task operations in one transaction with grouped SQL.
+
+  Whatever the number of operations, the tasks they refer to are locked
+  and read with one SELECT ... FOR UPDATE, created with one INSERT, updated
+  with one UPDATE (bulk_update) and counted with one counter UPDATE. The
+  operations are applied in order to the tasks in memory, so later
+  operations see the effect of earlier ones on the same task.
+
+  Args:
+    user: Owner of the tasks.
+    operations (list): Validated operations, e.g. from
+      `TaskBatchOperationSerializer(many=True).validated_data`.
+
+  Returns:
+    list: One (status code, task) pair per operation, in order. The task is
+      a copy as it was right after the operation, or None if the operation
+      referred to a task the user does not have (404).
+  """
+  now = timezone.now()
+  task_ids = {operation["id"] for operation in operations if operation["op"] != "create"}
+  results = [None] * len(operations)
+  created, changed, fields = [], {}, {"updated_at"}
+  with transaction.atomic():
+    # Locked in id order, so concurrent batches cannot deadlock on each other.
+    locked = Task.objects.select_for_update().filter(user=user, id__in=task_ids).order_by("id")
+    tasks = {task.id: task for task in locked} if task_ids else {}
+    before = {task.id: counters.bucket(task.status, task.is_deleted) for task in tasks.values()}
+
+    for index, operation in enumerate(operations):
+      if operation["op"] == "create":
+        created.append((index, Task(user=user, **operation["data"])))
+        continue
+      task = tasks.get(operation["id"])
+      # Like the single-task endpoints, only a status update reaches deleted tasks.
+      if task is None or (task.is_deleted and operation["op"] != "status"):
+        results[index] = (404, None)
+        continue
+      values = {"is_deleted": True} if operation["op"] == "delete" else operation["data"]
+      for name, value in values.items():
+        setattr(task, name, value)
+      task.updated_at = now
+      fields.update(values)
+      changed[task.id] = task
+      results[index] = (200, copy.copy(task))
+
+    if created:
+      Task.objects.bulk_create([task for _, task in created])
+      for index, task in created:
+        results[index] = (201, task)
+    if changed:
+      Task.objects.bulk_update(list(changed.values()), sorted(fields))
+
+    deltas = Counter()
+    for _, task in created:
+      deltas.update(counters.change(None, counters.bucket(task.status, task.is_deleted)))
+    for task in changed.values():
+      deltas.update(counters.change(before[task.id], counters.bucket(task.status, task.is_deleted)))
+    counters.apply_deltas(user.pk, deltas)
+  return results
+
+
+def bulk_create_tasks(user, validated_data):
+  """
+  Insert the given tasks for the user with chunked multi-row INSERTs.
+
+  Args:
+    user: Owner of the new tasks.
+    validated_data (list): Validated task payloads, e.g. from
+      `TaskSerializer(many=True).validated_data`.
+
+  Returns:
+    list: Ids of the created tasks, in payload order.
+  """
+  tasks = [Task(user=user, **data) for data in validated_data]
+  with transaction.atomic():
+    Task.objects.bulk_create(tasks, batch_size=settings.TASKS_BULK_CHUNK_SIZE)
+    counters.apply_deltas(user.pk, Counter(counters.bucket(task.status, task.is_deleted) for task in tasks))
+  return [task.id for task in tasks]
+
+
+def bulk_update_tasks(user, task_ids, **values):
+  """
+  Set-based update of the user's live tasks with the given ids.
+
+  Each chunk of ids is written with a single
+  `UPDATE ... WHERE user_id = ? AND is_deleted = false AND id IN (...)`
+  statement, and all chunks run in one transaction together with the
+  update of the user's counters. `updated_at` is always bumped, as `save()`
+  would do.
+
+  Args:
+    user: Owner of the tasks.
+    task_ids (list): Ids of the tasks to update.
+    **values: Field names and the values to set.
+
+  Returns:
+    list: Ids of the tasks that were updated.
+  """
+  values.setdefault("updated_at", timezone.now())
+  unique_ids = list(dict.fromkeys(str(task_id) for task_id in task_ids))
+  updated_ids, deltas = [], Counter()
+  after_deleted = values.get("is_deleted", False)
+  with transaction.atomic():
+    for chunk in chunked(unique_ids, settings.TASKS_BULK_CHUNK_SIZE):
+      for task_id, old_status in _update_chunk(user, chunk, values):
+        updated_ids.append(task_id)
+        deltas.update(counters.change(
+          counters.bucket(old_status, False),
+          counters.bucket(values.get("status", old_status), after_deleted),
+        ))
+    counters.apply_deltas(user.pk, deltas)
+  return updated_ids
+
+
+def _update_chunk(user, task_ids, values):
+  """Update one chunk of live tasks and return the (id, previous status) of the rows touched."""
+  if connection.vendor != "postgresql":
+    # Only PostgreSQL can return the previous status from the UPDATE itself:
+    # lock and read the rows, then update them.
+    queryset = Task.objects.select_for_update().filter(user=user, is_deleted=False, id__in=task_ids)
+    found = list(queryset.values_list("id", "status"))
+    Task.objects.filter(id__in=[task_id for task_id, _ in found]).update(**values)
+    return found
+
+  opts = Task._meta
+  quote_name = connection.ops.quote_name
+  assignments, params = [], []
+  for name, value in values.items():
+    field = opts.get_field(name)
+    assignments.append(f"{quote_name(field.column)} = %s")
+    params.append(field.get_db_prep_save(value, connection))
+
+  table = quote_name(opts.db_table)
+  pk_column = quote_name(opts.pk.column)
+  status_column = quote_name(opts.get_field("status").column)
+  # The subquery locks the rows and keeps their status from before the update.
+  sql = (
+    f"UPDATE {table} SET {', '.join(assignments)} "
+    f"FROM (SELECT {pk_column}, {status_column} FROM {table} "
+    f"WHERE {quote_name(opts.get_field('user').column)} = %s "
+    f"AND {quote_name(opts.get_field('is_deleted').column)} = %s "
+    f"AND {pk_column} IN ({', '.join(['%s'] * len(task_ids))}) FOR UPDATE) AS previous "
+    f"WHERE {table}.{pk_column} = previous.{pk_column} "
+    f"RETURNING {table}.{pk_column}, previous.{status_column}"
+  )
+  params.extend([user.pk, False, *task_ids])
+  with connection.cursor() as cursor:
+    cursor.execute(sql, params)
+    return cursor.fetchall()
@@ -0,0 +1,264 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import ArchivedTask, PurgedArchiveWatermark
+
+
+def query_params(request):
+  """Return the query parameters of a DRF or a plain Django request."""
+  return getattr(request, "query_params", None) or request.GET
+
+
+class TaskCursorPagination(BasePagination):
+  """
+  Keyset (cursor) pagination over tasks ordered by (created_at, id).
+
+  Every page is fetched with a `WHERE (created_at, id) > (cursor)` predicate
+  instead of an OFFSET, so the cost of a page does not depend on how deep the
+  client has scrolled. Cursors are opaque to clients.
+  """
+  cursor_query_param = "cursor"
+  page_size_query_param = "page_size"
+  ordering = ("created_at", "id")
+  invalid_cursor_message = "Invalid cursor."
+
+  def __init__(self):
+    self.page_size = settings.TASKS_PAGE_SIZE
+    self.max_page_size = settings.TASKS_MAX_PAGE_SIZE
+    self.next_cursor = None
+    self.base_url = None
+
+  def paginate_queryset(self, queryset, request, view=None):
+    """
+    Return one page of the queryset, starting right after the request cursor.
+
+    Args:
+      queryset: Unordered queryset of tasks.
+      request: HTTP request carrying the optional 'cursor' and 'page_size'.
+      view: The view being paginated.
+
+    Returns:
+      list: The tasks on the requested page.
+    """
+    page_queryset = self.get_page_queryset(queryset, request)
+    return self.get_page(list(page_queryset))
+
+  async def apaginate_queryset(self, queryset, request, view=None):
+    """Async version of paginate_queryset(), reading the page with the async ORM."""
+    page_queryset = self.get_page_queryset(queryset, request)
+    return self.get_page([row async for row in page_queryset])
+
+  def get_page_queryset(self, queryset, request):
+    """Filter, order and slice the queryset down to the requested page."""
+    self.base_url = request.build_absolute_uri()
+    self.page_size = self.get_page_size(request)
+
+    position = self.decode_cursor(request)
+    if position is not None:
+      field = self.ordering[0]
+      value, task_id = position
+      queryset = queryset.filter(
+        Q(**{f"{field}__gt": value}) | Q(**{field: value, "id__gt": task_id})
+      )
+
+    # Fetch one extra row to find out whether there is a next page.
+    return queryset.order_by(*self.ordering)[:self.page_size + 1]
+
+  def get_page(self, results):
+    """Trim the look-ahead row and remember the cursor of the next page."""
+    if len(results) > self.page_size:
+      results = results[:self.page_size]
+      self.next_cursor = self.encode_cursor(results[-1])
+    return results
+
+  def get_page_size(self, request):
+    """Return the requested page size, clamped to TASKS_MAX_PAGE_SIZE."""
+    try:
+      page_size = int(query_params(request)[self.page_size_query_param])
+    except (KeyError, ValueError):
+      return self.page_size
+    if page_size <= 0:
+      return self.page_size
+    return min(page_size, self.max_page_size)
+
+  def decode_cursor(self, request):
+    """
+    Decode the request cursor into a (created_at, id) position, or
+    (ordering[0], id) in subclasses.
+
+    Raises:
+      NotFound: If the cursor is malformed.
+    """
+    encoded = query_params(request).get(self.cursor_query_param)
+    if not encoded:
+      return None
+    return self.decode_position(encoded)[0]
+
+  def decode_position(self, encoded):
+    """
+    Decode an opaque cursor into its (datetime, id) position and its flags.
+
+    Raises:
+      NotFound: If the cursor is malformed.
+    """
+    try:
+      value, task_id, *flags = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+      return (datetime.fromisoformat(value), str(task_id)), flags
+    except (TypeError, ValueError, UnicodeError):
+      raise NotFound(self.invalid_cursor_message)
+
+  def encode_cursor(self, task):
+    """Encode the position of the given task as an opaque cursor."""
+    return self.encode_position((getattr(task, self.ordering[0]), task.id))
+
+  def encode_position(self, position, *flags):
+    """Encode a (datetime, id) position, followed by the given flags, as an opaque cursor."""
+    value, task_id = position
+    payload = [value.isoformat(), task_id, *flags]
+    return urlsafe_b64encode(json.dumps(payload).encode("ascii")).decode("ascii")
+
+  def get_next_link(self):
+    if self.next_cursor is None:
+      return None
+    return replace_query_param(self.base_url, self.cursor_query_param, self.next_cursor)
+
+  def get_paginated_data(self, data):
+    return {
+      "next": self.get_next_link(),
+      "results": data,
+    }
+
+  def get_paginated_response(self, data):
+    return Response(self.get_paginated_data(data))
+
+  def get_paginated_response_schema(self, schema):
+    return {
+      "type": "object",
+      "required": ["results"],
+      "properties": {
+        "next": {"type": "string", "nullable": True, "format": "uri"},
+        "results": schema,
+      },
+    }
+
+
+class CursorExpired(APIException):
+  status_code = status.HTTP_410_GONE
+  default_detail = "Cursor expired: changes since this cursor were archived. Sync the full task list again."
+  default_code = "cursor_expired"
+
+
+class TaskChangesPagination(TaskCursorPagination):
+  """
+  Keyset pagination over the changes of a user's tasks, ordered by (updated_at, id).
+
+  The client passes the cursor of its last sync as 'since' and stores the
+  'cursor' of the response for the next one. While 'has_more' is true, the
+  'next' link returns the following page.
+
+  A full sync (no 'since') is the list of the user's tasks, not a history
+  of their changes, so its 'next' links are flagged as such and never
+  expire, and its final 'cursor' is moved past the archived and purged
+  tombstones it could not return.
+  """
+  cursor_query_param = "since"
+  ordering = ("updated_at", "id")
+
+  def __init__(self):
+    super().__init__()
+    self.since = None
+    self.cursor = None
+    self.resync = True
+    self.user = None
+
+  def get_page_queryset(self, queryset, request):
+    self.user = request.user
+    return super().get_page_queryset(queryset, request)
+
+  def decode_cursor(self, request):
+    """
+    Decode the 'since' cursor into an (updated_at, id) position.
+
+    Raises:
+      NotFound: If the cursor is malformed.
+      CursorExpired: If tombstones after the cursor were archived or
+        purged, so the deletions since then can no longer be returned.
+    """
+    self.since = query_params(request).get(self.cursor_query_param) or None
+    if self.since is None:
+      return None
+    position, flags = self.decode_position(self.since)
+    self.resync = bool(flags and flags[0])
+    if not self.resync and self.tombstones_after(position):
+      raise CursorExpired()
+    return position
+
+  def tombstones_after(self, position):
+    """Return True if a tombstone of the user after the position was archived or purged."""
+    updated_at, task_id = position
+    after = Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=task_id)
+    purged_after = Q(purged_until__gt=updated_at) | Q(purged_until=updated_at, purged_id__gt=task_id)
+    return (
+      ArchivedTask.objects.filter(after, user=self.user).exists()
+      or PurgedArchiveWatermark.objects.filter(purged_after, user=self.user).exists()
+    )
+
+  def last_tombstone(self):
+    """Return the position of the user's newest archived or purged tombstone, or None."""
+    positions = [
+      ArchivedTask.objects.filter(user=self.user).order_by("-updated_at", "-id").values_list("updated_at", "id").first(),
+      PurgedArchiveWatermark.objects.filter(user=self.user).values_list("purged_until", "purged_id").first(),
+    ]
+    return max(filter(None, positions), default=None)
+
+  def encode_cursor(self, task):
+    position = (task.updated_at, task.id)
+    return self.encode_position(position, True) if self.resync else self.encode_position(position)
+
+  def get_page(self, results):
+    results = super().get_page(results)
+    if self.next_cursor is not None:
+      self.cursor = self.next_cursor
+    elif not self.resync:
+      # Where the next sync starts: after the last change returned, or
+      # where this one started if nothing changed.
+      self.cursor = self.encode_cursor(results[-1]) if results else self.since
+    else:
+      # Last page of a full sync: the next sync starts after the last task
+      # returned and after the tombstones no longer in the tasks table.
+      positions = [(results[-1].updated_at, results[-1].id)] if results else []
+      if self.since is not None:
+        positions.append(self.decode_position(self.since)[0])
+      positions.append(self.last_tombstone())
+      position = max(filter(None, positions), default=None)
+      self.cursor = None if position is None else self.encode_position(position)
+    return results
+
+  def get_paginated_data(self, data):
+    return {
+      "changes": data,
+      "cursor": self.cursor,
+      "has_more": self.next_cursor is not None,
+      "next": self.get_next_link(),
+    }
+
+  def get_paginated_response_schema(self, schema):
+    return {
+      "type": "object",
+      "required": ["changes", "cursor", "has_more"],
+      "properties": {
+        "changes": schema,
+        "cursor": {"type": "string", "nullable": True},
+        "has_more": {"type": "boolean"},
+        "next": {"type": "string", "nullable": True, "format": "uri"},
+      },
+    }
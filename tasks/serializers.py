@@ -1,5 +1,12 @@
-from rest_framework import serializers
-from .models import Task
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .enums import TaskStatus
+from .models import Task, TaskCounter
 
 class TaskSerializer(serializers.ModelSerializer):
   """
@@ -27,3 +34,146 @@ class TaskDeleteSerializer(serializers.ModelSerializer):
   class Meta:
     model = Task
     fields = ["is_deleted"]
+
+class TaskBatchOperationSerializer(serializers.Serializer):
+  """
+  Serializer validating one operation of a task batch request.
+
+  'data' is validated with the serializer of the matching single-task
+  endpoint; 'id' is required by every operation but 'create'.
+  """
+  data_serializers = {
+    "create": TaskSerializer,
+    "update": TaskSerializer,
+    "status": TaskStatusUpdateSerializer,
+    "delete": None,
+  }
+
+  op = serializers.ChoiceField(choices=list(data_serializers))
+  id = serializers.CharField(required=False, max_length=20)
+  data = serializers.DictField(required=False, default=dict)
+
+  def validate(self, attrs):
+    if attrs["op"] != "create" and not attrs.get("id"):
+      raise serializers.ValidationError({"id": ["This field is required."]})
+    serializer_class = self.data_serializers[attrs["op"]]
+    if serializer_class is None:
+      attrs["data"] = {}
+      return attrs
+    serializer = serializer_class(data=attrs["data"], partial=attrs["op"] != "create")
+    if not serializer.is_valid():
+      raise serializers.ValidationError({"data": serializer.errors})
+    attrs["data"] = serializer.validated_data
+    return attrs
+
+class TaskChangeSerializer(serializers.ModelSerializer):
+  """
+  Serializer for a changed task in the delta sync, including its deleted flag.
+  """
+  class Meta:
+    model = Task
+    fields = TaskSerializer.Meta.fields + ["is_deleted"]
+
+class TaskStatsSerializer(serializers.ModelSerializer):
+  """
+  Serializer for the task counts of a user.
+  """
+  total = serializers.ReadOnlyField()
+
+  class Meta:
+    model = TaskCounter
+    fields = ["pending", "completed", "deleted", "total"]
+
+class TaskListFilterSerializer(serializers.Serializer):
+  """
+  Serializer validating the filter query parameters of the task list.
+  """
+  status = serializers.ChoiceField(choices=[status.value for status in TaskStatus], required=False)
+  created_after = serializers.DateTimeField(required=False)
+  created_before = serializers.DateTimeField(required=False)
+  updated_after = serializers.DateTimeField(required=False)
+  updated_before = serializers.DateTimeField(required=False)
+  q = serializers.CharField(required=False, allow_blank=True, max_length=200)
+
+
+class TaskRowSerializer:
+  """
+  Read-only fast path producing exactly the output of TaskSerializer.
+
+  Works on plain `values_list(*TaskRowSerializer.fields)` rows instead of
+  model instances, and converts only the columns that need it: strings are
+  passed through and ISO 8601 datetimes are formatted directly. Any other
+  field falls back to its DRF `to_representation`.
+  """
+  serializer_class = TaskSerializer
+  fields = TaskSerializer.Meta.fields
+
+  def __init__(self):
+    drf_fields = self.serializer_class().fields
+    self.timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+    self.converters = [self.get_converter(drf_fields[name]) for name in self.fields]
+
+  def get_converter(self, field):
+    if isinstance(field, (serializers.CharField, serializers.ChoiceField)):
+      return None
+    if isinstance(field, serializers.DateTimeField):
+      if getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601 and not hasattr(field, 'timezone'):
+        return self.datetime_to_iso
+    return field.to_representation
+
+  def datetime_to_iso(self, value):
+    # Mirrors DateTimeField.enforce_timezone() followed by the ISO 8601 branch
+    # of DateTimeField.to_representation().
+    field_timezone = self.timezone
+    if field_timezone is not None:
+      if timezone.is_aware(value):
+        value = value.astimezone(field_timezone)
+      else:
+        value = timezone.make_aware(value, field_timezone)
+    elif timezone.is_aware(value):
+      value = timezone.make_naive(value, datetime.timezone.utc)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+      value = value[:-6] + 'Z'
+    return value
+
+  def to_representation(self, row):
+    return {
+      name: value if value is None or converter is None else converter(value)
+      for name, converter, value in zip(self.fields, self.converters, row)
+    }
+
+  def many(self, rows):
+    """
+    Serialize an iterable of rows.
+
+    Args:
+      rows: Tuples with the values of `TaskRowSerializer.fields`, in order.
+
+    Returns:
+      list: One dict per row, as `TaskSerializer(many=True).data` would return.
+    """
+    return list(self.iter(rows))
+
+  def iter(self, rows):
+    """Lazily serialize an iterable of rows, one dict at a time."""
+    self.timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+    for row in rows:
+      yield self.to_representation(row)
+
+
+class TaskChangeRowSerializer(TaskRowSerializer):
+  """
+  Fast path producing the output of TaskChangeSerializer, except that
+  deleted tasks are reduced to tombstones: their id, is_deleted and
+  updated_at.
+  """
+  serializer_class = TaskChangeSerializer
+  fields = TaskChangeSerializer.Meta.fields
+  tombstone_fields = ("id", "is_deleted", "updated_at")
+
+  def to_representation(self, row):
+    data = super().to_representation(row)
+    if data["is_deleted"]:
+      return {name: data[name] for name in self.tombstone_fields}
+    return data
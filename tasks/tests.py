@@ -1,8 +1,30 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
-from .models import Task
+from rest_framework_simplejwt.tokens import AccessToken
+from .counters import COUNTER_FIELDS, count_tasks, get_counters
+from . import cache as tasks_cache
+from .async_views import AsyncBulkUpdateTaskStatusView, AsyncTaskDetailView, AsyncTaskListCreateView
+from .archive import archivable_tasks
+from .models import ArchivedTask, PurgedArchiveWatermark, Task, TaskCounter
+from .operations import create_task
+from .renderers import TaskJSONRenderer
+from .serializers import TaskRowSerializer, TaskSerializer
+from utils.id_generator import SortableIdGenerator
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -28,6 +50,35 @@ class TaskTests(TestCase):
     self.assertEqual(response.status_code, status.HTTP_200_OK)
     self.assertGreater(len(response.data), 0)  # Ensure at least one task is returned
 
+  def test_list_tasks_cursor_pagination(self):
+    """Test walking the task list page by page with the cursor."""
+    for i in range(4):
+      Task.objects.create(user=self.user, title=f"Task {i}")
+    url = reverse('task-list-create')
+
+    seen = []
+    response = self.client.get(url, {"page_size": 2})
+    while True:
+      self.assertEqual(response.status_code, status.HTTP_200_OK)
+      self.assertLessEqual(len(response.data['results']), 2)
+      seen.extend(task['id'] for task in response.data['results'])
+      if not response.data['next']:
+        break
+      response = self.client.get(response.data['next'])
+
+    expected = list(
+      Task.objects.filter(user=self.user, is_deleted=False)
+      .order_by('created_at', 'id')
+      .values_list('id', flat=True)
+    )
+    self.assertEqual(seen, expected)
+
+  def test_list_tasks_invalid_cursor(self):
+    """Test that a malformed cursor is rejected."""
+    url = reverse('task-list-create')
+    response = self.client.get(url, {"cursor": "not-a-cursor"})
+    self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
   def test_create_task(self):
     """Test creating a new task."""
     url = reverse('task-list-create')
@@ -107,6 +158,92 @@ class TaskTests(TestCase):
     self.assertTrue(self.task.is_deleted)
     self.assertTrue(task2.is_deleted)
 
+  def test_bulk_update_task_status_is_set_based(self):
+    """Test that a bulk status update is one UPDATE and reports unknown ids."""
+    tasks = [Task.objects.create(user=self.user, title=f"Task {i}") for i in range(20)]
+    url = reverse('bulk-update-task-status')
+    data = {
+      "task_ids": [task.id for task in tasks] + ["tsk_doesnotexist"],
+      "status": "COMPLETED"
+    }
+    get_counters(self.user.pk)
+    # SAVEPOINT, UPDATE ... RETURNING (PostgreSQL) or SELECT ... FOR UPDATE
+    # and UPDATE, counters UPDATE, RELEASE SAVEPOINT
+    with self.assertNumQueries(4 if connection.vendor == 'postgresql' else 5):
+      response = self.client.post(url, data, format='json')
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(response.data['updated_count'], 20)
+    self.assertEqual(response.data['ignored_count'], 1)
+    self.assertEqual(response.data['not_found_ids'], ["tsk_doesnotexist"])
+    self.assertEqual(Task.objects.filter(user=self.user, status="COMPLETED").count(), 20)
+
+  def test_bulk_update_task_status_invalid_status(self):
+    """Test that bulk status updates reject unknown statuses."""
+    url = reverse('bulk-update-task-status')
+    data = {"task_ids": [self.task.id], "status": "DONE"}
+    response = self.client.post(url, data, format='json')
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    self.task.refresh_from_db()
+    self.assertNotEqual(self.task.status, "DONE")
+
+  def test_bulk_delete_ignores_other_users_tasks(self):
+    """Test that bulk delete never touches tasks of another user."""
+    other_user = User.objects.create_user(email="other@gmail.com", password="testpassword")
+    other_task = Task.objects.create(user=other_user, title="Not yours")
+    url = reverse('bulk-delete-tasks')
+    data = {"task_ids": [self.task.id, other_task.id]}
+    response = self.client.delete(url, data, format='json')
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(response.data['updated_count'], 1)
+    self.assertEqual(response.data['not_found_ids'], [other_task.id])
+    other_task.refresh_from_db()
+    self.assertFalse(other_task.is_deleted)
+
+  def test_bulk_create_tasks(self):
+    """Test creating a batch of tasks with a handful of INSERTs."""
+    url = reverse('bulk-create-tasks')
+    data = [{"title": f"Imported {i}", "description": "bulk"} for i in range(50)]
+    response = self.client.post(url, data, format='json')
+    self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    self.assertEqual(response.data['created_count'], 50)
+    created = Task.objects.filter(user=self.user, id__in=response.data['ids'])
+    self.assertEqual(created.count(), 50)
+
+  def test_bulk_create_tasks_reports_item_errors(self):
+    """Test that invalid items are reported by index and nothing is created."""
+    url = reverse('bulk-create-tasks')
+    data = [{"title": "Valid"}, {"description": "Missing title"}]
+    response = self.client.post(url, data, format='json')
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    self.assertEqual(len(response.data['errors']), 1)
+    self.assertEqual(response.data['errors'][0]['index'], 1)
+    self.assertIn('title', response.data['errors'][0]['errors'])
+    self.assertFalse(Task.objects.filter(title="Valid").exists())
+
+  def test_export_tasks_ndjson(self):
+    """Test streaming the task export as NDJSON."""
+    Task.objects.create(user=self.user, title="Second")
+    url = reverse('task-export')
+    response = self.client.get(url)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertTrue(response.streaming)
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    exported = [json.loads(line) for line in lines]
+    listed = self.client.get(reverse('task-list-create')).data['results']
+    self.assertEqual(exported, json.loads(json.dumps(listed)))
+
+  def test_export_tasks_csv(self):
+    """Test streaming the task export as CSV."""
+    url = reverse('task-export')
+    response = self.client.get(url, {"format": "csv"})
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(response["Content-Type"], "text/csv")
+    content = b''.join(response.streaming_content).decode()
+    rows = list(csv.DictReader(io.StringIO(content)))
+    self.assertEqual(len(rows), 1)
+    self.assertEqual(rows[0]['id'], self.task.id)
+    self.assertEqual(rows[0]['title'], self.task.title)
+
   def test_update_task_status(self):
     """Test updating the status of a single task."""
     url = reverse('task-status-update', args=[self.task.id])
@@ -129,3 +266,704 @@ class TaskTests(TestCase):
     response = self.client.put(url, data)
     self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+
+class SortableIdTests(SimpleTestCase):
+  def test_ids_fit_and_keep_prefix(self):
+    """Test that generated ids keep their prefix and fit the primary keys."""
+    generator = SortableIdGenerator()
+    task_id = generator.generate("tsk_", 16)
+    user_id = generator.generate("usr_", 16)
+    self.assertTrue(task_id.startswith("tsk_"))
+    self.assertEqual(len(task_id), Task._meta.pk.max_length)
+    self.assertEqual(len(user_id), User._meta.pk.max_length)
+
+  def test_ids_are_time_ordered(self):
+    """Test that ids sort in creation order across and within milliseconds."""
+    now = [1_800_000_000_000_000_000]
+    generator = SortableIdGenerator(clock=lambda: now[0])
+    ids = []
+    for step in range(50):
+      ids.append(generator.generate("tsk_", 16))
+      if step % 10 == 0:
+        now[0] += 1_000_000
+    self.assertEqual(ids, sorted(ids))
+    self.assertEqual(len(set(ids)), len(ids))
+
+  def test_suffix_overflow_moves_to_next_millisecond(self):
+    """Test that exhausting the suffix space of a millisecond keeps ids ordered."""
+    generator = SortableIdGenerator(clock=lambda: 1_800_000_000_000_000_000)
+    ids = [generator.generate("usr_", 9) for _ in range(100)]
+    self.assertEqual(ids, sorted(ids))
+    self.assertEqual(len(set(ids)), len(ids))
+
+
+class GenerateDatasetTests(TestCase):
+  def test_generates_users_and_tasks(self):
+    """Test that the dataset command writes realistic, time-ordered rows."""
+    call_command("generate_dataset", users=3, tasks_per_user=40, deleted_ratio=0.5, seed=7, stdout=io.StringIO())
+    users = User.objects.filter(email__startswith="dataset-")
+    self.assertEqual(users.count(), 3)
+    for user in users:
+      tasks = list(Task.objects.filter(user=user).order_by("created_at"))
+      self.assertEqual(len(tasks), 40)
+      self.assertEqual([task.id for task in tasks], sorted(task.id for task in tasks))
+      self.assertTrue(all(user.date_joined <= task.created_at <= task.updated_at for task in tasks))
+    self.assertTrue(Task.objects.filter(is_deleted=True).exists())
+    self.assertTrue(Task.objects.filter(status="COMPLETED").exists())
+    # The generated users can log in.
+    response = APIClient().post("/api/v1/users/login", {"email": users[0].email, "password": "password123"}, format="json")
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TaskIndexTests(TestCase):
+  """Check that the hot task queries are served by the Task indexes."""
+
+  def setUp(self):
+    self.user = User.objects.create_user(email="indexuser@gmail.com", password="testpassword")
+    self.tasks = Task.objects.filter(user=self.user, is_deleted=False)
+    if connection.vendor == 'postgresql':
+      # Tiny test tables would otherwise always be read with a sequential scan.
+      with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+
+  def primary_key_index(self):
+    if connection.vendor == 'postgresql':
+      return 'tasks_pkey'
+    return 'sqlite_autoindex_tasks_1'
+
+  def test_list_query_uses_live_created_index(self):
+    """Test that a task list page is read from the partial (user_id, created_at, id) index."""
+    plan = self.tasks.order_by('created_at', 'id')[:101].explain()
+    self.assertIn('tasks_user_live_created_idx', plan)
+
+  def test_detail_query_uses_primary_key(self):
+    """Test that a task detail lookup is read through the primary key."""
+    plan = self.tasks.filter(id='tsk_000000000000').explain()
+    self.assertIn(self.primary_key_index(), plan)
+
+  def test_bulk_query_uses_primary_key(self):
+    """Test that bulk lookups by id are read through the primary key."""
+    plan = self.tasks.filter(id__in=['tsk_000000000000', 'tsk_000000000001']).explain()
+    self.assertIn(self.primary_key_index(), plan)
+
+  def test_status_query_uses_status_index(self):
+    """Test that per-user status lookups use the (user_id, status) index."""
+    plan = Task.objects.filter(user=self.user, status='PENDING').explain()
+    self.assertIn('tasks_user_status_idx', plan)
+
+  def test_status_filtered_list_uses_live_status_index(self):
+    """Test that a status-filtered list page is read from the partial (user_id, status, created_at, id) index."""
+    plan = self.tasks.filter(status='PENDING').order_by('created_at', 'id')[:101].explain()
+    self.assertIn('tasks_user_live_status_idx', plan)
+
+
+class TaskFilterTests(TestCase):
+  """Check filtering and searching of the task list."""
+
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="filteruser@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+    self.groceries = Task.objects.create(user=self.user, title="Buy groceries", description="Milk and bread")
+    self.report = Task.objects.create(user=self.user, title="Write report", description="Quarterly numbers", status="COMPLETED")
+    self.url = reverse('task-list-create')
+
+  def ids(self, response):
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    return [task['id'] for task in response.data['results']]
+
+  def test_filter_by_status(self):
+    """Test that only tasks with the requested status are listed."""
+    self.assertEqual(self.ids(self.client.get(self.url, {"status": "COMPLETED"})), [self.report.id])
+
+  def test_filter_by_date_range(self):
+    """Test the created_after/created_before and updated_after/updated_before filters."""
+    Task.objects.filter(id=self.groceries.id).update(
+      created_at=timezone.now() - timedelta(days=10), updated_at=timezone.now() - timedelta(days=10),
+    )
+    boundary = (timezone.now() - timedelta(days=1)).isoformat()
+    self.assertEqual(self.ids(self.client.get(self.url, {"created_after": boundary})), [self.report.id])
+    self.assertEqual(self.ids(self.client.get(self.url, {"created_before": boundary})), [self.groceries.id])
+    self.assertEqual(self.ids(self.client.get(self.url, {"updated_before": boundary})), [self.groceries.id])
+
+  def test_search(self):
+    """Test that q matches words of the title or the description."""
+    self.assertEqual(self.ids(self.client.get(self.url, {"q": "milk"})), [self.groceries.id])
+    self.assertEqual(self.ids(self.client.get(self.url, {"q": "report quarterly"})), [self.report.id])
+    self.assertEqual(self.ids(self.client.get(self.url, {"q": "groceries", "status": "COMPLETED"})), [])
+
+  def test_invalid_filters(self):
+    """Test that an unknown status or a malformed date is rejected."""
+    self.assertEqual(self.client.get(self.url, {"status": "DONE"}).status_code, status.HTTP_400_BAD_REQUEST)
+    response = self.client.get(self.url, {"created_after": "yesterday"})
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    self.assertIn('created_after', response.data)
+
+
+class TaskCounterTests(TestCase):
+  """Check the per-user task counters and the stats endpoint."""
+
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="counteruser@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+
+  def stats(self):
+    response = self.client.get(reverse('task-stats'))
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    return response.data
+
+  def assertCountersMatchTasks(self):
+    expected = next(count_tasks([self.user.pk]))
+    counter = TaskCounter.objects.get(user=self.user)
+    for name in COUNTER_FIELDS:
+      self.assertEqual(getattr(counter, name), getattr(expected, name), name)
+
+  def test_counters_follow_every_write(self):
+    """Test that every write endpoint keeps the counters equal to the task counts."""
+    url = reverse('task-list-create')
+    ids = [self.client.post(url, {"title": f"Task {i}"}).data['id'] for i in range(4)]
+    self.client.post(reverse('bulk-create-tasks'), [{"title": "Done", "status": "COMPLETED"}], format='json')
+    self.client.post(reverse('task-status-update', args=[ids[0]]), {"status": "COMPLETED"})
+    self.client.post(reverse('task-detail', args=[ids[1]]), {"status": "COMPLETED"})
+    self.client.delete(reverse('task-detail', args=[ids[2]]))
+    self.client.post(reverse('bulk-update-task-status'), {"task_ids": ids, "status": "PENDING"}, format='json')
+    self.client.delete(reverse('bulk-delete-tasks'), {"task_ids": ids[:2]}, format='json')
+    self.assertCountersMatchTasks()
+    self.assertEqual(self.stats(), {"pending": 1, "completed": 1, "deleted": 3, "total": 2})
+
+  def test_stats_read_one_row(self):
+    """Test that the stats of a user with a counter row are read with one query."""
+    Task.objects.create(user=self.user, title="Untracked")
+    self.assertEqual(self.stats()['pending'], 1)
+    with self.assertNumQueries(1):
+      self.stats()
+
+  def test_failed_write_leaves_counters_unchanged(self):
+    """Test that the counters roll back with the task write."""
+    self.client.post(reverse('task-list-create'), {"title": "Task"})
+    with self.assertRaises(Exception):
+      with transaction.atomic():
+        create_task(self.user, {"title": "Rolled back"})
+        raise Exception("rollback")
+    self.assertEqual(self.stats()['pending'], 1)
+
+  def test_recompute_command_repairs_drift(self):
+    """Test that recompute_task_counters reports and fixes drifted counters."""
+    self.client.post(reverse('task-list-create'), {"title": "Task"})
+    TaskCounter.objects.filter(user=self.user).update(pending=7, deleted=2)
+    out = io.StringIO()
+    call_command("recompute_task_counters", check=True, stdout=out)
+    self.assertIn("1 users with drifted counters", out.getvalue())
+    self.assertEqual(TaskCounter.objects.get(user=self.user).pending, 7)
+
+    call_command("recompute_task_counters", email=[self.user.email], stdout=io.StringIO())
+    self.assertCountersMatchTasks()
+
+
+class TaskArchiveTests(TestCase):
+  """Check archival and purging of soft-deleted tasks."""
+
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="archiveuser@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+    url = reverse('task-list-create')
+    self.ids = [self.client.post(url, {"title": f"Task {i}"}).data['id'] for i in range(5)]
+    self.client.delete(reverse('bulk-delete-tasks'), {"task_ids": self.ids[:4]}, format='json')
+    # Three of the four deletions are past the retention window.
+    Task.objects.filter(id__in=self.ids[:3]).update(updated_at=timezone.now() - timedelta(days=40))
+
+  def archive(self, **options):
+    out = io.StringIO()
+    call_command("archive_tasks", delay=0, stdout=out, **options)
+    return out.getvalue()
+
+  def test_archives_old_deleted_tasks_in_batches(self):
+    """Test that only deleted tasks past the window move, one batch at a time."""
+    self.archive(batch_size=2, max_batches=1)
+    self.assertEqual(ArchivedTask.objects.count(), 2)
+    output = self.archive(batch_size=2)
+    self.assertIn("Archived 1 of ~1 tasks", output)
+    self.assertEqual(set(ArchivedTask.objects.values_list("id", flat=True)), set(self.ids[:3]))
+    self.assertEqual(set(Task.objects.values_list("id", flat=True)), set(self.ids[3:]))
+    archived = ArchivedTask.objects.get(id=self.ids[0])
+    self.assertEqual((archived.user, archived.title), (self.user, "Task 0"))
+    # Archived tasks no longer count as deleted.
+    self.assertEqual(self.client.get(reverse('task-stats')).data, {"pending": 1, "completed": 0, "deleted": 1, "total": 1})
+
+  def test_dry_run_moves_nothing(self):
+    """Test that --dry-run only counts the tasks to archive."""
+    self.assertIn("3 tasks to archive", self.archive(dry_run=True))
+    self.assertFalse(ArchivedTask.objects.exists())
+
+  def test_purge(self):
+    """Test that --purge deletes tasks archived before the purge window."""
+    self.archive()
+    ArchivedTask.objects.filter(id=self.ids[0]).update(archived_at=timezone.now() - timedelta(days=400))
+    self.archive(purge=True)
+    self.assertEqual(set(ArchivedTask.objects.values_list("id", flat=True)), set(self.ids[1:3]))
+    purged = PurgedArchiveWatermark.objects.get(user=self.user).purged_until
+    self.assertLess(purged, timezone.now() - timedelta(days=39))
+
+  def test_archive_query_uses_deleted_index(self):
+    """Test that the next batch is read from the partial (updated_at, id) index of deleted tasks."""
+    plan = archivable_tasks(timezone.now()).order_by('updated_at', 'id')[:500].explain()
+    self.assertIn('tasks_deleted_updated_idx', plan)
+
+
+@override_settings(TASKS_CHANGES_SETTLE_SECONDS=0)
+class TaskChangesTests(TestCase):
+  """Check the delta sync of task changes."""
+
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="syncuser@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+    self.ids = [self.client.post(reverse('task-list-create'), {"title": f"Task {i}"}).data['id'] for i in range(3)]
+
+  def sync(self, since=None, **params):
+    if since is not None:
+      params["since"] = since
+    response = self.client.get(reverse('task-changes'), params)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    return response.data
+
+  def test_returns_only_changes_since_cursor(self):
+    """Test that a sync returns the tasks created, updated and deleted since the last one."""
+    first = self.sync()
+    self.assertEqual([change['id'] for change in first['changes']], self.ids)
+    self.assertFalse(first['has_more'])
+
+    self.client.post(reverse('task-status-update', args=[self.ids[0]]), {"status": "COMPLETED"})
+    self.client.delete(reverse('task-detail', args=[self.ids[1]]))
+    created = self.client.post(reverse('task-list-create'), {"title": "New"}).data['id']
+
+    second = self.sync(first['cursor'])
+    changes = {change['id']: change for change in second['changes']}
+    self.assertEqual(list(changes), [self.ids[0], self.ids[1], created])
+    self.assertEqual(changes[self.ids[0]]['status'], "COMPLETED")
+    self.assertEqual(set(changes[self.ids[1]]), {"id", "is_deleted", "updated_at"})
+    self.assertTrue(changes[self.ids[1]]['is_deleted'])
+    self.assertFalse(changes[created]['is_deleted'])
+
+    unchanged = self.sync(second['cursor'])
+    self.assertEqual(unchanged['changes'], [])
+    self.assertEqual(unchanged['cursor'], second['cursor'])
+
+  def test_large_gaps_are_paginated(self):
+    """Test that changes are returned page by page until has_more is false."""
+    page = self.sync(page_size=2)
+    self.assertTrue(page['has_more'])
+    self.assertIsNotNone(page['next'])
+    rest = self.sync(page['cursor'], page_size=2)
+    self.assertFalse(rest['has_more'])
+    self.assertEqual([change['id'] for change in page['changes'] + rest['changes']], self.ids)
+
+  def test_settle_window(self):
+    """Test that changes younger than TASKS_CHANGES_SETTLE_SECONDS wait for a later sync."""
+    with self.settings(TASKS_CHANGES_SETTLE_SECONDS=60):
+      self.assertEqual(self.sync()['changes'], [])
+
+  def test_expired_cursor(self):
+    """Test that a cursor older than archived tombstones is rejected with a 410."""
+    cursor = self.sync()['cursor']
+    Task.objects.update(updated_at=timezone.now() - timedelta(days=60))
+    stale = self.sync()['cursor']
+    self.client.delete(reverse('task-detail', args=[self.ids[0]]))
+    Task.objects.filter(id=self.ids[0]).update(updated_at=timezone.now() - timedelta(days=45))
+    call_command("archive_tasks", delay=0, stdout=io.StringIO())
+
+    response = self.client.get(reverse('task-changes'), {"since": stale})
+    self.assertEqual(response.status_code, status.HTTP_410_GONE)
+    # A cursor after the archived tombstone is still valid.
+    self.assertEqual(self.sync(cursor)['changes'], [])
+
+  def test_cursor_expires_behind_recent_archive(self):
+    """Test that tombstones archived inside the retention window expire the cursors before them."""
+    cursor = self.sync()['cursor']
+    self.client.delete(reverse('task-detail', args=[self.ids[0]]))
+    call_command("archive_tasks", older_than_days=0, delay=0, stdout=io.StringIO())
+
+    response = self.client.get(reverse('task-changes'), {"since": cursor})
+    self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+  def test_cursor_expires_behind_purged_tombstones(self):
+    """Test that cursors stay expired once the archived tombstones are purged."""
+    cursor = self.sync()['cursor']
+    self.client.delete(reverse('task-detail', args=[self.ids[0]]))
+    call_command("archive_tasks", older_than_days=0, delay=0, stdout=io.StringIO())
+    ArchivedTask.objects.update(archived_at=timezone.now() - timedelta(days=400))
+    call_command("archive_tasks", purge=True, delay=0, stdout=io.StringIO())
+    self.assertFalse(ArchivedTask.objects.exists())
+
+    response = self.client.get(reverse('task-changes'), {"since": cursor})
+    self.assertEqual(response.status_code, status.HTTP_410_GONE)
+    # The full sync returns a cursor past the purged tombstone.
+    self.assertEqual(self.sync(self.sync()['cursor'])['changes'], [])
+
+  def test_full_sync_pages_past_archived_tombstones(self):
+    """Test that the pages of a full sync never expire and its cursor ends past the archived tombstones."""
+    self.client.delete(reverse('task-detail', args=[self.ids[1]]))
+    Task.objects.filter(id=self.ids[1]).update(updated_at=timezone.now())
+    call_command("archive_tasks", older_than_days=0, delay=0, stdout=io.StringIO())
+
+    page = self.sync(page_size=1)
+    ids = [change['id'] for change in page['changes']]
+    while page['has_more']:
+      page = self.sync(page['cursor'], page_size=1)
+      ids += [change['id'] for change in page['changes']]
+    self.assertEqual(ids, [self.ids[0], self.ids[2]])
+    self.assertEqual(self.sync(page['cursor'])['changes'], [])
+
+  def test_invalid_cursor(self):
+    """Test that a malformed cursor gets a 404, like the list cursor."""
+    response = self.client.get(reverse('task-changes'), {"since": "garbage"})
+    self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+  def test_changes_query_uses_updated_index(self):
+    """Test that changes are read from the (user_id, updated_at, id) index."""
+    since = timezone.now() - timedelta(days=1)
+    queryset = Task.objects.filter(user=self.user, updated_at__lt=timezone.now())
+    plan = queryset.filter(updated_at__gt=since).order_by('updated_at', 'id')[:101].explain()
+    self.assertIn('tasks_user_updated_idx', plan)
+
+
+class TaskWritePathTests(TestCase):
+  """Check the single-statement write path of the task detail, status and delete endpoints."""
+
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="writeuser@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+    self.task_id = self.client.post(reverse('task-list-create'), {"title": "Write Task", "description": "Desc"}).data['id']
+    self.url = reverse('task-detail', args=[self.task_id])
+
+  def test_update_writes_only_changed_columns(self):
+    """Test that an update writes the given columns and updated_at, in one statement on PostgreSQL."""
+    with CaptureQueriesContext(connection) as queries:
+      response = self.client.post(self.url, {"title": "Renamed"})
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(response.data['title'], "Renamed")
+    self.assertEqual(response.data['description'], "Desc")
+    updates = [query['sql'] for query in queries if query['sql'].startswith(('UPDATE "tasks"', 'WITH'))]
+    self.assertEqual(len(updates), 1)
+    self.assertIn('"title"', updates[0])
+    self.assertNotIn('"description" =', updates[0])
+    if connection.vendor == 'postgresql':
+      self.assertEqual(len(queries), 1)
+
+  def test_responses_and_counters(self):
+    """Test the response bodies of the status and delete endpoints and the counters they keep."""
+    response = self.client.post(reverse('task-status-update', args=[self.task_id]), {"status": "COMPLETED"})
+    self.assertEqual(response.data, {"status": "COMPLETED"})
+    response = self.client.delete(self.url)
+    self.assertEqual(response.data, {"is_deleted": True})
+    self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+    self.assertEqual(self.client.get(reverse('task-stats')).data['deleted'], 1)
+
+  def test_not_found_and_invalid(self):
+    """Test that a missing task is a 404 whatever the payload, and a bad payload a 400."""
+    missing = reverse('task-detail', args=["tsk_doesnotexist"])
+    self.assertEqual(self.client.post(missing, {"title": "x"}).status_code, status.HTTP_404_NOT_FOUND)
+    self.assertEqual(self.client.post(missing, {"status": "DONE"}).status_code, status.HTTP_404_NOT_FOUND)
+    self.assertEqual(self.client.delete(missing).status_code, status.HTTP_404_NOT_FOUND)
+    self.assertEqual(self.client.post(self.url, {"status": "DONE"}).status_code, status.HTTP_400_BAD_REQUEST)
+    status_url = reverse('task-status-update', args=["tsk_doesnotexist"])
+    self.assertEqual(self.client.post(status_url, {"status": "DONE"}).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskBatchTests(TestCase):
+  """Check the batch operations endpoint."""
+
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="batchuser@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+    self.ids = [self.client.post(reverse('task-list-create'), {"title": f"Task {i}"}).data['id'] for i in range(3)]
+    self.url = reverse('task-batch')
+
+  def batch(self, operations):
+    return self.client.post(self.url, operations, format='json')
+
+  def test_applies_operations_in_order(self):
+    """Test that every kind of operation is applied and reported in order."""
+    response = self.batch([
+      {"op": "create", "data": {"title": "Created"}},
+      {"op": "update", "id": self.ids[0], "data": {"title": "Renamed"}},
+      {"op": "status", "id": self.ids[0], "data": {"status": "COMPLETED"}},
+      {"op": "delete", "id": self.ids[1]},
+      {"op": "update", "id": self.ids[1], "data": {"title": "Too late"}},
+      {"op": "delete", "id": "tsk_doesnotexist"},
+    ])
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    results = response.data['results']
+    self.assertEqual([result['status'] for result in results], [201, 200, 200, 200, 404, 404])
+    self.assertEqual(results[0]['data']['title'], "Created")
+    self.assertEqual((results[1]['data']['title'], results[1]['data']['status']), ("Renamed", "PENDING"))
+    self.assertEqual(results[2]['data'], {"status": "COMPLETED"})
+    self.assertEqual(results[3]['data'], {"is_deleted": True})
+    self.assertEqual(results[4]['data'], {"detail": "Task not found."})
+
+    task = Task.objects.get(id=self.ids[0])
+    self.assertEqual((task.title, task.status), ("Renamed", "COMPLETED"))
+    self.assertEqual(Task.objects.get(id=self.ids[1]).title, "Task 1")
+    self.assertTrue(Task.objects.filter(id=results[0]['data']['id'], user=self.user).exists())
+    self.assertEqual(self.client.get(reverse('task-stats')).data, {"pending": 2, "completed": 1, "deleted": 1, "total": 3})
+
+  def test_query_count_does_not_grow_with_operations(self):
+    """Test that a batch runs grouped SQL whatever its number of operations."""
+    operations = [{"op": "update", "id": task_id, "data": {"title": f"Edit {n}"}} for n in range(10) for task_id in self.ids]
+    operations += [{"op": "status", "id": task_id, "data": {"status": "COMPLETED"}} for task_id in self.ids]
+    operations += [{"op": "create", "data": {"title": f"New {n}"}} for n in range(10)]
+    # SAVEPOINT, SELECT ... FOR UPDATE, INSERT, UPDATE, counters UPDATE, RELEASE SAVEPOINT
+    with self.assertNumQueries(6):
+      response = self.batch(operations)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(Task.objects.get(id=self.ids[2]).title, "Edit 9")
+
+  def test_invalid_operation_writes_nothing(self):
+    """Test that one invalid operation rejects the whole batch."""
+    response = self.batch([
+      {"op": "update", "id": self.ids[0], "data": {"title": "Renamed"}},
+      {"op": "status", "id": self.ids[1], "data": {"status": "DONE"}},
+      {"op": "update", "data": {"title": "No id"}},
+      {"op": "archive", "id": self.ids[2]},
+    ])
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+    self.assertIn('data', response.data['errors'][0]['errors'])
+    self.assertEqual(Task.objects.get(id=self.ids[0]).title, "Task 0")
+
+  def test_rejects_empty_and_oversized_batches(self):
+    """Test the size limits of a batch."""
+    self.assertEqual(self.batch([]).status_code, status.HTTP_400_BAD_REQUEST)
+    with self.settings(TASKS_BATCH_MAX_OPERATIONS=2):
+      response = self.batch([{"op": "delete", "id": task_id} for task_id in self.ids])
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskCacheTests(TestCase):
+  """Check the per-user versioned cache of task reads."""
+
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="cacheuser@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+    self.task = Task.objects.create(user=self.user, title="Cached Task")
+
+  def test_list_is_cached_until_a_write(self):
+    """Test that list reads are served from the cache until the user writes."""
+    url = reverse('task-list-create')
+    self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+    with self.assertNumQueries(0):
+      response = self.client.get(url)
+    self.assertEqual(response["X-Cache"], "HIT")
+
+    self.client.post(url, {"title": "Another task"})
+    response = self.client.get(url)
+    self.assertEqual(response["X-Cache"], "MISS")
+    self.assertEqual(len(response.data['results']), 2)
+
+  def test_detail_is_invalidated_by_status_update(self):
+    """Test that a status update invalidates the cached task detail."""
+    url = reverse('task-detail', args=[self.task.id])
+    self.client.get(url)
+    self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+    self.client.post(reverse('task-status-update', args=[self.task.id]), {"status": "COMPLETED"})
+    response = self.client.get(url)
+    self.assertEqual(response["X-Cache"], "MISS")
+    self.assertEqual(response.data['status'], "COMPLETED")
+
+  def test_cache_is_per_user(self):
+    """Test that a cached list is never served to another user."""
+    url = reverse('task-list-create')
+    self.client.get(url)
+    other_user = User.objects.create_user(email="othercache@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=other_user)
+    response = self.client.get(url)
+    self.assertEqual(response["X-Cache"], "MISS")
+    self.assertEqual(response.data['results'], [])
+
+  def test_shared_cache_is_invalidated_by_another_worker(self):
+    """Test that a version bumped through a second cache instance invalidates the reads cached by the first."""
+    url = reverse('task-list-create')
+    with tempfile.TemporaryDirectory() as location:
+      backend = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location}
+      with self.settings(CACHES={"default": backend}, TASKS_CACHE_WORKERS=2):
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+        other_worker = caches.create_connection("default")
+        with mock.patch("tasks.cache.get_cache", return_value=other_worker):
+          tasks_cache.bump_user_version(self.user.pk)
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+  @override_settings(TASKS_CACHE_WORKERS=2)
+  def test_process_local_cache_is_bypassed_with_several_workers(self):
+    """Test that task reads are not cached in a LocMemCache that other workers cannot invalidate."""
+    url = reverse('task-list-create')
+    self.client.get(url)
+    self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+  def test_cache_stats_requires_superuser(self):
+    """Test that cache statistics are only visible to superusers."""
+    url = reverse('task-cache-stats')
+    self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+    self.user.is_superuser = True
+    self.user.save()
+    response = self.client.get(url)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertIn('hit_ratio', response.data)
+
+
+class TaskConditionalGetTests(TestCase):
+  """Check ETag / Last-Modified handling of the task read endpoints."""
+
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="etaguser@gmail.com", password="testpassword")
+    self.client.force_authenticate(user=self.user)
+    self.task = Task.objects.create(user=self.user, title="Conditional Task")
+
+  def test_list_not_modified(self):
+    """Test that a list request with a current ETag gets a 304."""
+    url = reverse('task-list-create')
+    response = self.client.get(url)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertNotIn('Last-Modified', response)
+    response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+  def test_list_etag_changes_after_soft_delete(self):
+    """Test that soft-deleting a task that is not the newest one still changes the list ETag."""
+    newer = Task.objects.create(user=self.user, title="Newer Task")
+    url = reverse('task-list-create')
+    etag = self.client.get(url)['ETag']
+    self.client.delete(reverse('task-detail', args=[self.task.id]))
+    Task.objects.filter(id=self.task.id).update(updated_at=newer.updated_at - timedelta(seconds=1))
+    cache.clear()
+    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertNotEqual(response['ETag'], etag)
+    self.assertEqual([task['id'] for task in response.data['results']], [newer.id])
+
+  def test_list_etag_changes_after_write(self):
+    """Test that a write changes the list ETag."""
+    url = reverse('task-list-create')
+    etag = self.client.get(url)['ETag']
+    self.client.post(reverse('task-status-update', args=[self.task.id]), {"status": "COMPLETED"})
+    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertNotEqual(response['ETag'], etag)
+
+  def test_detail_not_modified(self):
+    """Test that detail requests honour If-None-Match and If-Modified-Since."""
+    url = reverse('task-detail', args=[self.task.id])
+    response = self.client.get(url)
+    etag, last_modified = response['ETag'], response['Last-Modified']
+    cache.clear()
+    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+    self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    self.assertEqual(response['ETag'], etag)
+    response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class TaskFastPathTests(TestCase):
+  """Check that the fast read path matches TaskSerializer byte for byte."""
+
+  def setUp(self):
+    self.user = User.objects.create_user(email="fastuser@gmail.com", password="testpassword")
+    titles = ["Plain", "Ünïcödé ✓ 🚀", "Line\u2028separator", 'Quote " and \\ backslash']
+    for title in titles:
+      Task.objects.create(user=self.user, title=title, description=title * 2)
+    self.tasks = Task.objects.filter(user=self.user).order_by('created_at', 'id')
+
+  def test_rows_match_task_serializer(self):
+    """Test that TaskRowSerializer output equals TaskSerializer output."""
+    expected = TaskSerializer(self.tasks, many=True).data
+    rows = self.tasks.values_list(*TaskRowSerializer.fields)
+    self.assertEqual(TaskRowSerializer().many(rows), expected)
+
+  def test_rendered_bytes_match(self):
+    """Test that the fast path renders the same bytes as DRF."""
+    expected = JSONRenderer().render(TaskSerializer(self.tasks, many=True).data)
+    rows = self.tasks.values_list(*TaskRowSerializer.fields)
+    self.assertEqual(TaskJSONRenderer().render(TaskRowSerializer().many(rows)), expected)
+
+
+class AsyncTaskViewTests(TestCase):
+  """Check the async task views served under ASGI."""
+
+  def setUp(self):
+    self.factory = AsyncRequestFactory()
+    self.user = User.objects.create_user(email="asyncuser@gmail.com", password="testpassword")
+    self.task = Task.objects.create(user=self.user, title="Async Task")
+    self.auth = {"headers": {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}}
+
+  async def test_list_returns_page(self):
+    """Test that the async list returns a page of the user's tasks."""
+    request = self.factory.get("/api/v1/tasks", **self.auth)
+    response = await AsyncTaskListCreateView.as_view()(request)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    body = json.loads(response.content)
+    self.assertEqual([task['id'] for task in body['results']], [self.task.id])
+    self.assertIsNone(body['next'])
+
+  async def test_create_and_retrieve(self):
+    """Test creating a task and reading it back through the async views."""
+    request = self.factory.post("/api/v1/tasks", {"title": "Created async"}, content_type="application/json", **self.auth)
+    response = await AsyncTaskListCreateView.as_view()(request)
+    self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    task_id = json.loads(response.content)['id']
+
+    request = self.factory.get(f"/api/v1/tasks/{task_id}", **self.auth)
+    response = await AsyncTaskDetailView.as_view()(request, pk=task_id)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(json.loads(response.content)['title'], "Created async")
+
+  async def test_list_cache_is_shared_and_invalidated(self):
+    """Test that the async views read and invalidate the same cache entries as the sync ones."""
+    request = self.factory.get("/api/v1/tasks", **self.auth)
+    self.assertEqual((await AsyncTaskListCreateView.as_view()(request))["X-Cache"], "MISS")
+    request = self.factory.get("/api/v1/tasks", **self.auth)
+    self.assertEqual((await AsyncTaskListCreateView.as_view()(request))["X-Cache"], "HIT")
+    self.assertEqual(await tasks_cache.aget_user_version(self.user.pk), tasks_cache.get_user_version(self.user.pk))
+
+    request = self.factory.post("/api/v1/tasks", {"title": "Created async"}, content_type="application/json", **self.auth)
+    await AsyncTaskListCreateView.as_view()(request)
+    request = self.factory.get("/api/v1/tasks", **self.auth)
+    response = await AsyncTaskListCreateView.as_view()(request)
+    self.assertEqual(response["X-Cache"], "MISS")
+    self.assertEqual(len(json.loads(response.content)['results']), 2)
+
+  async def test_bulk_update_status(self):
+    """Test the async bulk status update."""
+    data = {"task_ids": [self.task.id, "tsk_doesnotexist"], "status": "COMPLETED"}
+    request = self.factory.post("/api/v1/tasks/bulk-update-status", data, content_type="application/json", **self.auth)
+    response = await AsyncBulkUpdateTaskStatusView.as_view()(request)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(json.loads(response.content)['not_found_ids'], ["tsk_doesnotexist"])
+    task = await Task.objects.aget(pk=self.task.pk)
+    self.assertEqual(task.status, "COMPLETED")
+
+  async def test_export_streams_async_iterator(self):
+    """Test that the export served over ASGI streams from an async iterator instead of a buffered list."""
+    client = AsyncClient()
+    response = await client.get(reverse('task-export'), **self.auth)
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertTrue(response.is_async)
+    self.assertTrue(hasattr(response.streaming_content, '__aiter__'))
+    content = b''.join([chunk async for chunk in response.streaming_content])
+    self.assertEqual([json.loads(line)['id'] for line in content.splitlines()], [self.task.id])
+
+    response = await client.get(reverse('task-export'), {"format": "csv"}, **self.auth)
+    content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+    self.assertEqual([row['id'] for row in csv.DictReader(io.StringIO(content))], [self.task.id])
+
+  async def test_requires_authentication(self):
+    """Test that requests without a token are rejected like DRF would."""
+    response = await AsyncTaskListCreateView.as_view()(self.factory.get("/api/v1/tasks"))
+    self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    self.assertIn('WWW-Authenticate', response)
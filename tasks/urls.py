@@ -1,9 +1,27 @@
+from django.conf import settings
 from django.urls import path
-from .views import TaskListCreateView, TaskDetailView, TaskStatusUpdateView, BulkUpdateTaskStatusView, BulkDeleteTasksView
+from .views import TaskListCreateView, TaskDetailView, TaskStatusUpdateView, BulkUpdateTaskStatusView, BulkDeleteTasksView, BulkCreateTasksView, TaskExportView, TaskCacheStatsView, TaskStatsView, TaskChangesView, TaskBatchView
+
+if settings.TASKS_ASYNC_VIEWS:
+  # Served by an ASGI server (config.asgi): the hot task endpoints run as native
+  # async views on the async ORM instead of DRF views in a thread.
+  from .async_views import (
+    AsyncTaskListCreateView as TaskListCreateView,
+    AsyncTaskDetailView as TaskDetailView,
+    AsyncTaskStatusUpdateView as TaskStatusUpdateView,
+    AsyncBulkUpdateTaskStatusView as BulkUpdateTaskStatusView,
+    AsyncBulkDeleteTasksView as BulkDeleteTasksView,
+  )
 
 urlpatterns = [
   path('tasks', TaskListCreateView.as_view(), name='task-list-create'), # List and create tasks
+  path('tasks/cache-stats', TaskCacheStatsView.as_view(), name='task-cache-stats'), # Task read cache hit/miss ratio
+  path('tasks/changes', TaskChangesView.as_view(), name='task-changes'), # Tasks changed since a cursor, with tombstones
+  path('tasks/stats', TaskStatsView.as_view(), name='task-stats'), # Pending/completed/deleted task counts
+  path('tasks/export', TaskExportView.as_view(), name='task-export'), # Stream all tasks as NDJSON or CSV
   path('tasks/bulk-update-status', BulkUpdateTaskStatusView.as_view(), name='bulk-update-task-status'), # Bulk status update
+  path('tasks/bulk-create', BulkCreateTasksView.as_view(), name='bulk-create-tasks'), # Bulk create tasks
+  path('tasks/batch', TaskBatchView.as_view(), name='task-batch'), # Several task operations in one request
   path('tasks/bulk-delete', BulkDeleteTasksView.as_view(), name='bulk-delete-tasks'), # Bulk delete tasks
   path('tasks/<str:pk>', TaskDetailView.as_view(), name='task-detail'), # Retrieve, update, and delete a Task
   path('tasks/<str:pk>/status', TaskStatusUpdateView.as_view(), name='task-status-update'), # Update Todo status
@@ -1,31 +1,83 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
+from utils.permissions import IsSuperUser
+
+from . import cache
+from .conditional import list_etag, not_modified_response, set_validators, task_validators
+from .enums import TaskStatus
+from .export import aiter_task_rows, astream_csv, astream_ndjson, iter_task_rows, stream_csv, stream_ndjson
+from .filters import filter_tasks
 from .models import Task
-from .serializers import TaskSerializer, TaskStatusUpdateSerializer, TaskDeleteSerializer
+from .counters import get_counters
+from .operations import bulk_create_tasks, bulk_update_tasks, create_task, run_batch, update_task
+from .pagination import TaskChangesPagination, TaskCursorPagination, query_params
+from .renderers import CSVRenderer, NDJSONRenderer, TaskJSONRenderer
+from .serializers import TaskSerializer, TaskStatusUpdateSerializer, TaskDeleteSerializer, TaskListFilterSerializer, TaskRowSerializer, TaskStatsSerializer, TaskChangeRowSerializer, TaskBatchOperationSerializer
 
 class TaskListCreateView(APIView):
   """
   View to list all tasks for the authenticated user and create a new task.
   """
   permission_classes = [IsAuthenticated]
+  renderer_classes = [TaskJSONRenderer, BrowsableAPIRenderer]
 
   def get(self, request):
       """
-      GET request to list all tasks for the authenticated user.
+      GET request to list tasks for the authenticated user, one page at a time.
+
+      Supports conditional requests: a client sending a matching
+      If-None-Match gets a 304 without the page being serialized.
+
+      The list can be filtered with the 'status', 'created_after',
+      'created_before', 'updated_after' and 'updated_before' query
+      parameters, and searched with 'q' (see filters.search_tasks).
       
       Args:
-        request: HTTP request object.
+        request: HTTP request object, optionally carrying 'cursor', 'page_size' and filters.
       
       Returns:
-        Response: Serialized list of tasks for the user.
+        Response: A page of serialized tasks and the link to the next page.
       """
       try:
+        cache_key = cache.list_key(request.user.pk, request)
+        entry = cache.cache_get(cache_key)
+        if entry is not None:
+          return cached_response(request, entry, hit=True)
+
+        filters = TaskListFilterSerializer(data=query_params(request))
+        filters.is_valid(raise_exception=True)
+
         todos = Task.objects.filter(user=request.user, is_deleted=False)
-        serializer = TaskSerializer(todos, many=True)
-        return Response(serializer.data)
+        # Validators of the whole list: any change to it may change the filtered page.
+        etag = list_etag(todos, request)
+        not_modified = not_modified_response(request, etag, None)
+        if not_modified is not None:
+          return not_modified
+
+        todos = filter_tasks(todos, filters.validated_data)
+        paginator = TaskCursorPagination()
+        rows = todos.values_list(*TaskRowSerializer.fields, named=True)
+        page = paginator.paginate_queryset(rows, request, view=self)
+        entry = {
+          "data": paginator.get_paginated_response(TaskRowSerializer().many(page)).data,
+          "etag": etag,
+          "last_modified": None,
+        }
+        cache.cache_set(cache_key, entry)
+        return cached_response(request, entry, hit=False)
+      except APIException:
+        raise
       except Exception as e:
         return Response(
           {"error": "An error occurred while retrieving tasks."},
@@ -45,8 +97,9 @@ class TaskListCreateView(APIView):
     serializer = TaskSerializer(data=request.data)
     if serializer.is_valid():
       try:
-        serializer.save(user=request.user)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        task = create_task(request.user, serializer.validated_data)
+        cache.bump_user_version(request.user.pk)
+        return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
       except Exception as e:
         return Response(
           {"error": "An error occurred while saving the task."},
@@ -55,11 +108,85 @@ class TaskListCreateView(APIView):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TaskChangesView(APIView):
+  """
+  View returning the tasks of the authenticated user changed since a cursor.
+  """
+  permission_classes = [IsAuthenticated]
+  renderer_classes = [TaskJSONRenderer, BrowsableAPIRenderer]
+
+  def get(self, request):
+      """
+      GET request to sync the tasks created, updated or deleted since the 'since' cursor.
+
+      Changes are read in (updated_at, id) order from the tasks_user_updated_idx
+      index, so a sync costs as much as the number of changes rather than
+      the number of tasks. Deleted tasks are returned as tombstones until
+      they are archived. Without 'since', every task is returned. Changes
+      younger than TASKS_CHANGES_SETTLE_SECONDS wait for the next sync.
+
+      Args:
+        request: HTTP request object, optionally carrying 'since' and 'page_size'.
+
+      Returns:
+        Response: A page of changes, the cursor of the next sync and whether
+          more changes are waiting, or a 410 if the cursor has expired.
+      """
+      try:
+        settled = timezone.now() - timedelta(seconds=settings.TASKS_CHANGES_SETTLE_SECONDS)
+        changes = Task.objects.filter(user=request.user, updated_at__lt=settled)
+        paginator = TaskChangesPagination()
+        rows = changes.values_list(*TaskChangeRowSerializer.fields, named=True)
+        page = paginator.paginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response(TaskChangeRowSerializer().many(page))
+      except APIException:
+        raise
+      except Exception as e:
+        return Response(
+          {"error": "An error occurred while retrieving task changes."},
+          status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def cached_response(request, entry, hit):
+  """
+  Build the response of a task read from its cache entry.
+
+  Args:
+    request: HTTP request object, possibly carrying conditional headers.
+    entry (dict): Serialized 'data' with its 'etag' and 'last_modified'.
+    hit (bool): True if the entry was read from the cache.
+
+  Returns:
+    HttpResponse: A 304 if the client copy is current, else the data, with
+      ETag/Last-Modified and an 'X-Cache: HIT' or 'X-Cache: MISS' header.
+  """
+  response = not_modified_response(request, entry["etag"], entry["last_modified"])
+  if response is None:
+    response = set_validators(Response(entry["data"]), entry["etag"], entry["last_modified"])
+  response["X-Cache"] = "HIT" if hit else "MISS"
+  return response
+
+
+def user_task(user, pk, include_deleted=False):
+  """
+  Return a queryset of the user's task with the given id.
+
+  The write views only query it to tell a 404 from a 400 when the payload is
+  invalid; valid writes find out whether the task exists from the update.
+  """
+  queryset = Task.objects.filter(id=pk, user=user)
+  if not include_deleted:
+    queryset = queryset.filter(is_deleted=False)
+  return queryset
+
+
 class TaskDetailView(APIView):
   """
   View to retrieve, update, or delete a specific task.
   """
   permission_classes = [IsAuthenticated]
+  renderer_classes = [TaskJSONRenderer, BrowsableAPIRenderer]
 
   def get_object(self, pk, user):
       """
@@ -88,11 +215,23 @@ class TaskDetailView(APIView):
     Returns:
         Response: Serialized task data or a 404 not found error.
     """
+    cache_key = cache.detail_key(request.user.pk, pk)
+    entry = cache.cache_get(cache_key)
+    if entry is not None:
+      return cached_response(request, entry, hit=True)
+
     task = self.get_object(pk, request.user)
     if not task:
       return Response({"message": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+    etag, last_modified = task_validators(task)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+      return not_modified
+
     serializer = TaskSerializer(task)
-    return Response(serializer.data)
+    entry = {"data": serializer.data, "etag": etag, "last_modified": last_modified}
+    cache.cache_set(cache_key, entry)
+    return cached_response(request, entry, hit=False)
 
   def post(self, request, pk):
     """
@@ -105,20 +244,23 @@ class TaskDetailView(APIView):
     Returns:
       Response: Serialized updated task data or validation errors.
     """
-    task = self.get_object(pk, request.user)
-    if not task:
-      return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
-    serializer = TaskSerializer(task, data=request.data, partial=True)
-    if serializer.is_valid():
-      try:
-        serializer.save()
-        return Response(serializer.data)
-      except Exception as e:
-        return Response(
-          {"error": "An error occurred while updating the task."},
-          status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    # Validated without the task: the update itself tells whether it exists.
+    serializer = TaskSerializer(data=request.data, partial=True)
+    if not serializer.is_valid():
+      if not user_task(request.user, pk).exists():
+        return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+      task = update_task(request.user, pk, serializer.validated_data)
+      if not task:
+        return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      cache.bump_user_version(request.user.pk)
+      return Response(TaskSerializer(task).data)
+    except Exception as e:
+      return Response(
+        {"error": "An error occurred while updating the task."},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+      )
 
   def delete(self, request, pk):
     """
@@ -131,16 +273,15 @@ class TaskDetailView(APIView):
     Returns:
       Response: Confirmation of deletion or 404 error if not found.
     """
-    task = self.get_object(pk, request.user)
-    if not task:
-        return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
-    
     # Soft-delete: set the is_deleted flag to True.
-    serializer = TaskDeleteSerializer(task, data={"is_deleted": True})
+    serializer = TaskDeleteSerializer(data={"is_deleted": True})
     if serializer.is_valid():
       try:
-        serializer.save()
-        return Response(serializer.data)
+        task = update_task(request.user, pk, serializer.validated_data)
+        if not task:
+          return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+        cache.bump_user_version(request.user.pk)
+        return Response(TaskDeleteSerializer(task).data)
       except Exception as e:
         return Response(
           {"error": "An error occurred while deleting the task."},
@@ -166,22 +307,60 @@ class TaskStatusUpdateView(APIView):
     Returns:
       Response: Updated task data or a 404 not found error.
     """
+    serializer = TaskStatusUpdateSerializer(data=request.data, partial=True)
+    if not serializer.is_valid():
+      if not user_task(request.user, pk, include_deleted=True).exists():
+        return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     try:
-      task = Task.objects.get(id=pk, user=request.user)
-    except Task.DoesNotExist:
-      return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
-      
-    serializer = TaskStatusUpdateSerializer(task, data=request.data, partial=True)
-    if serializer.is_valid():
-      try:
-        serializer.save()
-        return Response(serializer.data)
-      except Exception as e:
-        return Response(
-          {"error": "An error occurred while updating the task status."},
-          status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+      task = update_task(request.user, pk, serializer.validated_data, include_deleted=True)
+      if not task:
+        return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+      cache.bump_user_version(request.user.pk)
+      return Response(TaskStatusUpdateSerializer(task).data)
+    except Exception as e:
+      return Response(
+        {"error": "An error occurred while updating the task status."},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+      )
+
+
+def validate_task_ids(task_ids):
+  """Return the error message for an invalid 'task_ids' payload, else None."""
+  if not task_ids or not isinstance(task_ids, list):
+    return "Invalid input. 'task_ids' must be a list of task IDs."
+  return None
+
+
+def validate_bulk_status(status_to_update):
+  """Return the error message for an invalid bulk 'status' payload, else None."""
+  if not status_to_update:
+    return "Missing 'status' field. Provide a status to update tasks."
+  valid_statuses = [task_status.value for task_status in TaskStatus]
+  if status_to_update not in valid_statuses:
+    return f"Invalid 'status'. Must be one of: {', '.join(valid_statuses)}."
+  return None
+
+
+def bulk_result(task_ids, updated_ids):
+  """
+  Build the summary returned by the bulk endpoints.
+
+  Args:
+    task_ids (list): Task ids sent by the client.
+    updated_ids (list): Ids of the tasks that were actually updated.
+
+  Returns:
+    dict: Updated/ignored counts and the ids that were not found.
+  """
+  updated = set(updated_ids)
+  not_found_ids = [task_id for task_id in dict.fromkeys(map(str, task_ids)) if task_id not in updated]
+  return {
+    "updated_count": len(updated_ids),
+    "ignored_count": len(task_ids) - len(updated_ids),
+    "not_found_ids": not_found_ids,
+    "errors": []
+  }
 
 
 class BulkUpdateTaskStatusView(APIView):
@@ -204,38 +383,20 @@ class BulkUpdateTaskStatusView(APIView):
       status_to_update = request.data.get("status")
 
       # Validate request data
-      if not task_ids or not isinstance(task_ids, list):
-        return Response(
-          {"error": "Invalid input. 'task_ids' must be a list of task IDs."},
-          status=status.HTTP_400_BAD_REQUEST
-        )
+      error = validate_task_ids(task_ids) or validate_bulk_status(status_to_update)
+      if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
-      if not status_to_update:
+      try:
+        updated_ids = bulk_update_tasks(request.user, task_ids, status=status_to_update)
+        cache.bump_user_version(request.user.pk)
+      except Exception as e:
         return Response(
-          {"error": "Missing 'status' field. Provide a status to update tasks."},
-          status=status.HTTP_400_BAD_REQUEST
+          {"error": "An error occurred while updating the tasks."},
+          status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-      # Retrieve tasks
-      user_tasks = Task.objects.filter(user=request.user, id__in=task_ids, is_deleted=False)
-      updated_count, ignored_count = 0, len(task_ids) - user_tasks.count()
-      errors = []
-
-      for task in user_tasks:
-        try:
-          task.status = status_to_update
-          task.save()
-          updated_count += 1
-        except Exception as e:
-          errors.append({"task_id": task.id, "error": str(e)})
-
-      response_data = {
-        "updated_count": updated_count,
-        "ignored_count": ignored_count,
-        "errors": errors
-      }
-
-      return Response(response_data, status=status.HTTP_200_OK)
+      return Response(bulk_result(task_ids, updated_ids), status=status.HTTP_200_OK)
 
 
 class BulkDeleteTasksView(APIView):
@@ -257,28 +418,227 @@ class BulkDeleteTasksView(APIView):
       task_ids = request.data.get("task_ids")
 
       # Validate request data
-      if not task_ids or not isinstance(task_ids, list):
+      error = validate_task_ids(task_ids)
+      if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+      try:
+        updated_ids = bulk_update_tasks(request.user, task_ids, is_deleted=True)
+        cache.bump_user_version(request.user.pk)
+      except Exception as e:
+        return Response(
+          {"error": "An error occurred while deleting the tasks."},
+          status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+      return Response(bulk_result(task_ids, updated_ids), status=status.HTTP_200_OK)
+
+
+class BulkCreateTasksView(APIView):
+  """
+  API endpoint to create many tasks for the authenticated user in one request.
+  """
+  permission_classes = [IsAuthenticated]
+
+  def post(self, request):
+      """
+      POST request to create a batch of tasks.
+      
+      Args:
+        request: HTTP request object containing a list of task payloads.
+      
+      Returns:
+        Response: Ids of the created tasks, or per-item validation errors.
+      """
+      if not isinstance(request.data, list) or not request.data:
         return Response(
-          {"error": "Invalid input. 'task_ids' must be a list of task IDs."},
+          {"error": "Invalid input. Provide a non-empty list of tasks."},
           status=status.HTTP_400_BAD_REQUEST
         )
 
-      user_tasks = Task.objects.filter(user=request.user, id__in=task_ids, is_deleted=False)
-      updated_count, ignored_count = 0, len(task_ids) - user_tasks.count()
-      errors = []
+      max_size = settings.TASKS_BULK_CREATE_MAX_SIZE
+      if len(request.data) > max_size:
+        return Response(
+          {"error": f"Too many tasks. At most {max_size} tasks can be created per request."},
+          status=status.HTTP_400_BAD_REQUEST
+        )
 
-      for task in user_tasks:
-        try:
-          task.is_deleted = True
-          task.save()
-          updated_count += 1
-        except Exception as e:
-            errors.append({"task_id": task.id, "error": str(e)})
+      serializer = TaskSerializer(data=request.data, many=True)
+      if not serializer.is_valid():
+        errors = [
+          {"index": index, "errors": item_errors}
+          for index, item_errors in enumerate(serializer.errors)
+          if item_errors
+        ]
+        return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+      try:
+        created_ids = bulk_create_tasks(request.user, serializer.validated_data)
+        cache.bump_user_version(request.user.pk)
+      except Exception as e:
+        return Response(
+          {"error": "An error occurred while creating the tasks."},
+          status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
       response_data = {
-        "updated_count": updated_count,
-        "ignored_count": ignored_count,
-        "errors": errors
+        "created_count": len(created_ids),
+        "ids": created_ids
       }
 
-      return Response(response_data, status=status.HTTP_200_OK)
+      return Response(response_data, status=status.HTTP_201_CREATED)
+
+
+class TaskBatchView(APIView):
+  """
+  API endpoint applying an ordered list of create/update/status/delete operations in one request.
+  """
+  permission_classes = [IsAuthenticated]
+  renderer_classes = [TaskJSONRenderer, BrowsableAPIRenderer]
+
+  # Response body of a successful operation, per operation.
+  result_serializers = {
+    "create": TaskSerializer,
+    "update": TaskSerializer,
+    "status": TaskStatusUpdateSerializer,
+    "delete": TaskDeleteSerializer,
+  }
+
+  def post(self, request):
+      """
+      POST request to apply a batch of task operations.
+
+      Every operation is validated first, as its single-task endpoint would;
+      if any is invalid nothing is written. The operations then run in one
+      transaction (see operations.run_batch). An operation on a task the
+      user does not have gets a 404 result without stopping the others.
+
+      Args:
+        request: HTTP request object containing a list of operations, each
+          with 'op', the task 'id' (except for 'create') and its 'data'.
+
+      Returns:
+        Response: One result per operation, in order, with the status code
+          and body its single-task endpoint would have returned.
+      """
+      if not isinstance(request.data, list) or not request.data:
+        return Response(
+          {"error": "Invalid input. Provide a non-empty list of operations."},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      max_size = settings.TASKS_BATCH_MAX_OPERATIONS
+      if len(request.data) > max_size:
+        return Response(
+          {"error": f"Too many operations. At most {max_size} operations can be sent per request."},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      serializer = TaskBatchOperationSerializer(data=request.data, many=True)
+      if not serializer.is_valid():
+        errors = [
+          {"index": index, "errors": item_errors}
+          for index, item_errors in enumerate(serializer.errors)
+          if item_errors
+        ]
+        return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+      operations = serializer.validated_data
+      try:
+        outcomes = run_batch(request.user, operations)
+        cache.bump_user_version(request.user.pk)
+      except Exception as e:
+        return Response(
+          {"error": "An error occurred while applying the operations."},
+          status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+      results = []
+      for operation, (status_code, task) in zip(operations, outcomes):
+        if task is None:
+          data = {"detail": "Task not found."}
+        else:
+          data = self.result_serializers[operation["op"]](task).data
+        results.append({"status": status_code, "data": data})
+      return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class TaskExportView(APIView):
+  """
+  API endpoint to stream every task of the authenticated user as NDJSON or CSV.
+  """
+  permission_classes = [IsAuthenticated]
+  renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+  def get(self, request):
+      """
+      GET request to export all tasks of the authenticated user.
+
+      The output format follows the Accept header or the 'format' query
+      parameter ('ndjson' or 'csv'), and defaults to NDJSON.
+
+      Under ASGI the content is an async iterator over the async ORM:
+      Django would read a sync iterator into a list before sending the
+      first byte.
+
+      Args:
+        request: HTTP request object.
+
+      Returns:
+        StreamingHttpResponse: The user's tasks, streamed row by row.
+      """
+      tasks = Task.objects.filter(user=request.user, is_deleted=False)
+      renderer = request.accepted_renderer
+      as_csv = renderer.format == CSVRenderer.format
+      if isinstance(request._request, ASGIRequest):
+        rows = aiter_task_rows(tasks)
+        content = astream_csv(rows) if as_csv else astream_ndjson(rows)
+      else:
+        rows = iter_task_rows(tasks)
+        content = stream_csv(rows) if as_csv else stream_ndjson(rows)
+
+      response = StreamingHttpResponse(content, content_type=renderer.media_type)
+      response["Content-Disposition"] = f'attachment; filename="tasks.{renderer.format}"'
+      return response
+
+
+class TaskCacheStatsView(APIView):
+  """
+  API endpoint exposing the hit/miss ratio of the task read cache of this process.
+  """
+  permission_classes = [IsSuperUser]
+
+  def get(self, request):
+      """
+      GET request to read the task cache statistics.
+
+      Args:
+        request: HTTP request object.
+
+      Returns:
+        Response: Hits, misses and hit ratio since the process started.
+      """
+      return Response(cache.stats.as_dict(), status=status.HTTP_200_OK)
+
+
+class TaskStatsView(APIView):
+  """
+  API endpoint returning the number of pending, completed and deleted tasks of the authenticated user.
+  """
+  permission_classes = [IsAuthenticated]
+
+  def get(self, request):
+      """
+      GET request to read the task counts of the authenticated user.
+
+      The counts are read from the user's counter row, which every task
+      write keeps up to date, so the cost does not depend on the number of
+      tasks.
+
+      Args:
+        request: HTTP request object.
+
+      Returns:
+        Response: Pending, completed, deleted and total (live) task counts.
+      """
+      return Response(TaskStatsSerializer(get_counters(request.user.pk)).data, status=status.HTTP_200_OK)
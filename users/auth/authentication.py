@@ -0,0 +1,111 @@
+import copy
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from monitoring.metrics import record_cache
+from monitoring.timing import span
+from utils.lru_cache import LRUCache
+
+# Users resolved from access tokens, keyed by user id. Entries are dropped when
+# the user is saved or deleted in this process (see users.signals) and expire
+# after AUTH_USER_CACHE_TTL seconds everywhere else: that is how long a
+# deactivated user can keep authenticating on the other workers.
+user_cache = LRUCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+  """
+  JWTAuthentication that keeps recently seen users in a bounded LRU+TTL cache,
+  saving the `users` lookup on most authenticated requests.
+  """
+
+  def authenticate(self, request):
+    with span("auth"):
+      return super().authenticate(request)
+
+  def get_user(self, validated_token):
+    """
+    Return the user of the token, from the cache when possible.
+
+    Args:
+      validated_token: The validated access token.
+
+    Returns:
+      CustomUser: A private copy of the user, safe to mutate per request.
+
+    Raises:
+      InvalidToken: If the token has no user id claim.
+      AuthenticationFailed: If the user is missing, inactive or changed password.
+    """
+    try:
+      user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+      raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    user = user_cache.get(user_id)
+    record_cache("auth_users", user is not None)
+    if user is None:
+      user = super().get_user(validated_token)
+      user_cache.set(user_id, copy.copy(user))
+      return user
+
+    self.check_user(user, validated_token)
+    return copy.copy(user)
+
+  async def aauthenticate(self, request):
+    """
+    Async version of authenticate() for plain Django async views.
+
+    Token parsing and validation are CPU only; the user is read from the
+    cache or with the async ORM.
+
+    Args:
+      request: Django HTTP request.
+
+    Returns:
+      tuple: (user, validated_token), or None if no token was sent.
+    """
+    with span("auth"):
+      header = self.get_header(request)
+      if header is None:
+        return None
+      raw_token = self.get_raw_token(header)
+      if raw_token is None:
+        return None
+      validated_token = self.get_validated_token(raw_token)
+      return await self.aget_user(validated_token), validated_token
+
+  async def aget_user(self, validated_token):
+    """Async version of get_user()."""
+    try:
+      user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+      raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    user = user_cache.get(user_id)
+    record_cache("auth_users", user is not None)
+    if user is None:
+      try:
+        user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+      except self.user_model.DoesNotExist:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+      self.check_user(user, validated_token)
+      user_cache.set(user_id, copy.copy(user))
+      return user
+
+    self.check_user(user, validated_token)
+    return copy.copy(user)
+
+  def check_user(self, user, validated_token):
+    """Apply the is_active and revoke-token checks of JWTAuthentication.get_user()."""
+    if not user.is_active:
+      raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    if api_settings.CHECK_REVOKE_TOKEN:
+      if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
@@ -0,0 +1,127 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from utils.bloom_filter import BloomFilter
+from utils.lru_cache import LRUCache
+
+# Tokens blacklisted by another process within this many seconds before a
+# sync are read again by the next sync, so rows committed late (long
+# transactions, clock skew between hosts) are not missed.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BlacklistCache:
+  """
+  Process-local view of the refresh token blacklist.
+
+  A Bloom filter holds the JTIs of all blacklisted tokens and answers "not
+  blacklisted" without touching the database; it is refreshed from
+  `BlacklistedToken` at most every `sync_interval` seconds with an
+  incremental query. JTIs the filter reports are confirmed against the
+  database once and then kept in a bounded LRU cache of known-blacklisted
+  tokens.
+
+  Tokens blacklisted in this process are known immediately (see
+  users.signals); tokens blacklisted by other processes are picked up within
+  `sync_interval` seconds.
+
+  Args:
+    capacity (int): Number of JTIs the Bloom filter and the positive cache
+      are sized for.
+    error_rate (float): False positive rate of the Bloom filter at capacity.
+    sync_interval (float): Seconds between two syncs with the database.
+  """
+
+  def __init__(self, capacity=100000, error_rate=0.01, sync_interval=5):
+    self.capacity = capacity
+    self.error_rate = error_rate
+    self.sync_interval = sync_interval
+    self.positives = LRUCache(maxsize=capacity, ttl=api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    self._lock = threading.Lock()
+    self._bloom = None
+    self._synced_at = None
+    self._next_sync = 0.0
+
+  def is_blacklisted(self, jti):
+    """
+    Return whether the token with the given JTI is blacklisted.
+
+    Args:
+      jti (str): JTI claim of the refresh token.
+
+    Returns:
+      bool: True if the token is blacklisted.
+    """
+    if self.sync_interval <= 0:
+      return self._query(jti)
+
+    self.sync()
+    if jti not in self._bloom:
+      return False
+    if jti in self.positives:
+      return True
+
+    blacklisted = self._query(jti)
+    if blacklisted:
+      self.positives.set(jti, True)
+    return blacklisted
+
+  def add(self, jti):
+    """Record a token blacklisted by this process."""
+    with self._lock:
+      if self._bloom is not None and jti not in self._bloom:
+        self._bloom.add(jti)
+    self.positives.set(jti, True)
+
+  def sync(self):
+    """Load tokens blacklisted since the last sync, if it is due."""
+    if time.monotonic() < self._next_sync:
+      return
+    with self._lock:
+      if time.monotonic() < self._next_sync:
+        return
+      started_at = timezone.now()
+      if self._bloom is None or len(self._bloom) > self._bloom.capacity:
+        self._rebuild()
+      else:
+        queryset = BlacklistedToken.objects.filter(blacklisted_at__gte=self._synced_at - SYNC_OVERLAP)
+        for jti in queryset.values_list("token__jti", flat=True).iterator():
+          # The overlap reads JTIs again; only new ones count toward the
+          # capacity that triggers a rebuild.
+          if jti not in self._bloom:
+            self._bloom.add(jti)
+      self._synced_at = started_at
+      self._next_sync = time.monotonic() + self.sync_interval
+
+  def _rebuild(self):
+    # Expired tokens are rejected before their blacklist entry matters, so
+    # only tokens that can still be used are loaded.
+    queryset = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+    jtis = list(queryset.values_list("token__jti", flat=True))
+    self._bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+    for jti in jtis:
+      self._bloom.add(jti)
+
+  def _query(self, jti):
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+  def clear(self):
+    """Forget everything; the next check reloads the blacklist."""
+    with self._lock:
+      self._bloom = None
+      self._synced_at = None
+      self._next_sync = 0.0
+    self.positives.clear()
+
+
+blacklist_cache = BlacklistCache(
+  capacity=settings.AUTH_BLACKLIST_CACHE_SIZE,
+  error_rate=settings.AUTH_BLACKLIST_CACHE_ERROR_RATE,
+  sync_interval=settings.AUTH_BLACKLIST_SYNC_INTERVAL,
+)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+  """
+  PBKDF2-SHA256 hasher whose work factor is set by AUTH_PASSWORD_ITERATIONS.
+
+  It keeps the `pbkdf2_sha256` algorithm name, so it verifies every existing
+  hash. Hashes stored with another iteration count are re-hashed with the
+  configured one on the next successful login (see `must_update()`), which
+  keeps the CPU cost of a login the same for every account.
+  """
+
+  @property
+  def iterations(self):
+    return settings.AUTH_PASSWORD_ITERATIONS or super().iterations
@@ -0,0 +1,17 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import blacklist_cache
+
+
+class CachedRefreshToken(RefreshToken):
+  """
+  RefreshToken that checks the blacklist through the process-local
+  `blacklist_cache` instead of querying `BlacklistedToken` every time.
+  """
+
+  def check_blacklist(self):
+    if blacklist_cache.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+      raise TokenError(_("Token is blacklisted"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:06
+
+import utils.id_generator
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_sortable_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='id',
+            field=models.CharField(default=utils.id_generator.generate_sortable_user_id, editable=False, max_length=20, primary_key=True, serialize=False),
+        ),
+    ]
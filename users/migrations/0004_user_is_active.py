@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_longer_sortable_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 
-from utils.id_generator import generate_custom_user_id
+from utils.id_generator import generate_sortable_user_id
 
 class UserProfileManager(BaseUserManager):
 	use_in_migration = True
@@ -16,10 +16,12 @@ class UserProfileManager(BaseUserManager):
 
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
-	id = models.CharField(max_length=14, primary_key=True, editable=False, default= generate_custom_user_id)
+	id = models.CharField(max_length=20, primary_key=True, editable=False, default= generate_sortable_user_id)
 	username = None
 	name = models.CharField(max_length=100)
 	email = models.EmailField(max_length=255, unique=True)
+	# Inactive users are rejected by CachedJWTAuthentication and the login.
+	is_active = models.BooleanField(default=True)
 	date_joined = models.DateTimeField(auto_now_add=True)
 	last_login = models.TimeField(auto_now=True)
 	objects = UserProfileManager()
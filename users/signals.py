@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .auth.authentication import user_cache
+from .auth.blacklist import blacklist_cache
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+	"""Drop the user from the authentication cache whenever it changes."""
+	user_pk = instance.pk
+	user_cache.delete(user_pk)
+	# A request may cache the old row again before the change commits.
+	transaction.on_commit(lambda: user_cache.delete(user_pk))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def cache_blacklisted_token(sender, instance, created, **kwargs):
+	"""Make a token blacklisted by this process known to the blacklist cache."""
+	if created:
+		jti = instance.token.jti
+		transaction.on_commit(lambda: blacklist_cache.add(jti))
@@ -1,3 +1,166 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .auth.authentication import user_cache
+from .auth.blacklist import BlacklistCache, blacklist_cache
+from .auth.hashers import PBKDF2PasswordHasher
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+  def setUp(self):
+    """Set up a user and a client authenticated with a real access token."""
+    user_cache.clear()
+    self.user = User.objects.create_user(email="authuser@gmail.com", password="Old-password-123")
+    self.client = APIClient()
+    access = RefreshToken.for_user(self.user).access_token
+    self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+  def test_user_lookup_is_cached(self):
+    """Test that only the first request looks the user up in the database."""
+    with self.assertNumQueries(1):
+      response = self.client.get("/api/v1/users/me")
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    with self.assertNumQueries(0):
+      response = self.client.get("/api/v1/users/me")
+    self.assertEqual(response.data['email'], self.user.email)
+
+  def test_password_change_invalidates_cache(self):
+    """Test that changing the password drops the cached user."""
+    self.client.get("/api/v1/users/me")
+    self.assertIn(self.user.pk, user_cache)
+    data = {
+      "old_password": "Old-password-123",
+      "new_password": "New-password-456",
+      "new_password2": "New-password-456",
+    }
+    response = self.client.put(reverse('change_password'), data, format='json')
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertNotIn(self.user.pk, user_cache)
+
+  def test_deleted_user_is_rejected(self):
+    """Test that a deleted user cannot authenticate from a stale cache entry."""
+    self.client.get("/api/v1/users/me")
+    self.user.delete()
+    response = self.client.get("/api/v1/users/me")
+    self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+  def test_deactivated_user_is_rejected(self):
+    """Test that a deactivated user is rejected on the next request in the same process."""
+    self.client.get("/api/v1/users/me")
+    self.assertIn(self.user.pk, user_cache)
+    self.user.is_active = False
+    self.user.save()
+    response = self.client.get("/api/v1/users/me")
+    self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+  def test_user_cached_again_before_commit_is_dropped(self):
+    """Test that a copy of the user cached while the change was uncommitted is dropped on commit."""
+    with self.captureOnCommitCallbacks(execute=True):
+      self.user.is_active = False
+      self.user.save()
+      # A concurrent request still reading the committed, active row.
+      user_cache.set(self.user.pk, User(pk=self.user.pk, email=self.user.email, is_active=True))
+    self.assertNotIn(self.user.pk, user_cache)
+
+
+@override_settings(AUTH_PASSWORD_ITERATIONS=1000)
+class LoginTests(TestCase):
+  def setUp(self):
+    self.client = APIClient()
+    self.user = User.objects.create_user(email="loginuser@gmail.com", password="Login-password-123")
+    self.url = reverse('token_obtain_pair')
+
+  def test_login_issues_tokens(self):
+    """Test that a login reads the user once, verifies once and returns a token pair."""
+    with mock.patch.object(PBKDF2PasswordHasher, "verify", autospec=True, side_effect=PBKDF2PasswordHasher.verify) as verify:
+      # Select the user, insert the outstanding refresh token.
+      with self.assertNumQueries(2):
+        response = self.client.post(self.url, {"email": self.user.email, "password": "Login-password-123"}, format='json')
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(verify.call_count, 1)
+    self.assertEqual(AccessToken(response.data['access'])['user_id'], self.user.pk)
+    self.assertIn('refresh', response.data)
+
+  def test_invalid_credentials(self):
+    """Test that unknown emails and wrong passwords get the same 401."""
+    for data in (
+      {"email": "nobody@gmail.com", "password": "Login-password-123"},
+      {"email": self.user.email, "password": "wrong-password"},
+      {"email": self.user.email},
+    ):
+      response = self.client.post(self.url, data, format='json')
+      self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+      self.assertEqual(response.data, {"message": "Invalid email or password"})
+
+  def test_login_upgrades_hash_parameters(self):
+    """Test that a hash with an outdated iteration count is re-hashed on login."""
+    hasher = PBKDF2PasswordHasher()
+    self.user.password = hasher.encode("Login-password-123", hasher.salt(), iterations=500)
+    self.user.save()
+    response = self.client.post(self.url, {"email": self.user.email, "password": "Login-password-123"}, format='json')
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.user.refresh_from_db()
+    self.assertEqual(hasher.decode(self.user.password)["iterations"], 1000)
+
+
+class BlacklistCacheTests(TestCase):
+  def setUp(self):
+    blacklist_cache.clear()
+    self.user = User.objects.create_user(email="refreshuser@gmail.com", password="Refresh-password-123")
+    self.client = APIClient()
+    self.client.force_authenticate(user=self.user)
+    self.refresh = RefreshToken.for_user(self.user)
+
+  def test_refresh_skips_blacklist_query(self):
+    """Test that refreshing a live token reads the blacklist only on the first sync."""
+    url = reverse('token_refresh')
+    with self.assertNumQueries(1):
+      response = self.client.post(url, {"refresh": str(self.refresh)}, format='json')
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    with self.assertNumQueries(0):
+      response = self.client.post(url, {"refresh": str(self.refresh)}, format='json')
+    self.assertIn('access', response.data)
+
+  def test_logout_is_seen_immediately(self):
+    """Test that a token blacklisted by logout cannot be refreshed or reused."""
+    self.client.post(reverse('token_refresh'), {"refresh": str(self.refresh)}, format='json')
+    with self.captureOnCommitCallbacks(execute=True):
+      response = self.client.post(reverse('auth_logout'), {"refresh_token": str(self.refresh)}, format='json')
+    self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+    with self.assertNumQueries(0):
+      response = self.client.post(reverse('token_refresh'), {"refresh": str(self.refresh)}, format='json')
+    self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+  def test_blacklist_from_other_process_is_synced(self):
+    """Test that tokens blacklisted elsewhere are picked up by the next sync."""
+    cache = BlacklistCache(sync_interval=5)
+    jti = self.refresh['jti']
+    with mock.patch("users.auth.blacklist.time.monotonic", return_value=100.0):
+      self.assertFalse(cache.is_blacklisted(jti))
+      # Written without signals, as another worker would.
+      BlacklistedToken.objects.bulk_create([BlacklistedToken(token=OutstandingToken.objects.get(jti=jti))])
+      self.assertFalse(cache.is_blacklisted(jti))
+    with mock.patch("users.auth.blacklist.time.monotonic", return_value=106.0):
+      self.assertTrue(cache.is_blacklisted(jti))
+    self.assertIn(jti, cache.positives)
+
+  def test_overlapping_syncs_count_each_jti_once(self):
+    """Test that JTIs read again by the sync overlap do not fill up the Bloom filter."""
+    cache = BlacklistCache(sync_interval=5)
+    jti = self.refresh['jti']
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token=OutstandingToken.objects.get(jti=jti))])
+    for now in (100.0, 106.0, 112.0):
+      with mock.patch("users.auth.blacklist.time.monotonic", return_value=now):
+        cache.is_blacklisted(jti)
+    cache.add(jti)
+    self.assertEqual(len(cache._bloom), 1)
@@ -1,12 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework import status
-from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import update_last_login
 from .auth.serializer import RegisterAccountSerializer
+from .auth.tokens import CachedRefreshToken
 from .models import CustomUser
 
 
@@ -20,31 +23,34 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 		"""
 		Handle POST request to authenticate user and generate JWT tokens.
 
+		The user is looked up once and the password is hashed once. A password
+		stored with outdated hasher parameters is re-hashed with the current
+		ones on a successful login.
+
 		Args:
 			request (Request): The incoming HTTP request containing 'email' and 'password'.
 
 		Returns:
 			Response: JSON response with JWT token pair or error message.
-
-		Raises:
-			serializers.ValidationError: If user credentials are invalid or authentication fails.
 		"""
 		email = request.data.get("email")
 		password = request.data.get("password")
 
-		try:
-			# Check if the email exists in the database
-			user = CustomUser.objects.get(email=email)
-		except CustomUser.DoesNotExist:
+		user = CustomUser.objects.filter(email=email).first() if email else None
+		if user is None:
+			# Hash the password anyway, so that unknown emails cannot be told
+			# apart from wrong passwords by the response time.
+			make_password(password)
 			return Response({"message": "Invalid email or password"}, status=status.HTTP_401_UNAUTHORIZED)
 
-		# Authenticate user using Django's authenticate method
-		user = authenticate(request, email=email, password=password)
-		if user is None:
+		if not password or not user.check_password(password) or not user.is_active:
 			return Response({"message": "Invalid email or password"}, status=status.HTTP_401_UNAUTHORIZED)
 
-		# If authentication is successful, continue with token generation
-		return super().post(request, *args, **kwargs)
+		refresh = RefreshToken.for_user(user)
+		if api_settings.UPDATE_LAST_LOGIN:
+			update_last_login(None, user)
+
+		return Response({"refresh": str(refresh), "access": str(refresh.access_token)}, status=status.HTTP_200_OK)
 
 
 class AccountView(APIView):
@@ -95,7 +101,7 @@ class LogoutView(APIView):
 					return Response({"message": "Refresh token is required"}, status=status.HTTP_400_BAD_REQUEST)
 
 				# Attempt to blacklist the refresh token
-				token = RefreshToken(refresh_token)
+				token = CachedRefreshToken(refresh_token)
 				token.blacklist()  # Blacklists the refresh token
 
 				return Response({"message": "Logout successful"}, status=status.HTTP_205_RESET_CONTENT)
@@ -0,0 +1,44 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+  """
+  Fixed-size Bloom filter of strings.
+
+  Membership tests never give false negatives: `key not in bloom` means the
+  key was never added. `key in bloom` is wrong with a probability of about
+  `error_rate` as long as no more than `capacity` keys were added.
+
+  Args:
+    capacity (int): Number of keys the filter is sized for.
+    error_rate (float): Target false positive probability at capacity.
+  """
+
+  def __init__(self, capacity=100000, error_rate=0.01):
+    capacity = max(int(capacity), 1)
+    self.capacity = capacity
+    self.error_rate = error_rate
+    self.num_bits = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+    self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+    self.count = 0
+    self._bits = bytearray((self.num_bits + 7) // 8)
+
+  def _positions(self, key):
+    # Double hashing: the i-th position is h1 + i * h2.
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+  def add(self, key):
+    """Add key to the filter."""
+    for position in self._positions(key):
+      self._bits[position >> 3] |= 1 << (position & 7)
+    self.count += 1
+
+  def __contains__(self, key):
+    return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+  def __len__(self):
+    return self.count
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+  """
+  Thread-safe, process-local LRU cache whose entries also expire after a TTL.
+
+  Args:
+    maxsize (int): Maximum number of entries; the least recently used entry
+      is evicted beyond it.
+    ttl (float): Seconds an entry stays valid after being set.
+  """
+
+  def __init__(self, maxsize=1024, ttl=60):
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self._data = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key, default=None):
+    """Return the cached value for key, or default if missing or expired."""
+    with self._lock:
+      item = self._data.get(key)
+      if item is not None:
+        value, expires_at = item
+        if expires_at > time.monotonic():
+          self._data.move_to_end(key)
+          self.hits += 1
+          return value
+        del self._data[key]
+      self.misses += 1
+      return default
+
+  def set(self, key, value):
+    """Cache value under key for `ttl` seconds."""
+    with self._lock:
+      self._data[key] = (value, time.monotonic() + self.ttl)
+      self._data.move_to_end(key)
+      while len(self._data) > self.maxsize:
+        self._data.popitem(last=False)
+
+  def delete(self, key):
+    """Drop key from the cache, if present."""
+    with self._lock:
+      self._data.pop(key, None)
+
+  def clear(self):
+    with self._lock:
+      self._data.clear()
+
+  def __contains__(self, key):
+    with self._lock:
+      item = self._data.get(key)
+      return item is not None and item[1] > time.monotonic()
+
+  def __len__(self):
+    return len(self._data)